@@ -0,0 +1,162 @@
+"""
+Benchmark of WebsiteAnalyzer's HTML metadata extraction.
+
+Compares the single-pass extractor in tools/html_metadata.py (each available
+backend) with the BeautifulSoup code WebsiteAnalyzer used before: one
+html.parser parse followed by separate find() calls for the date, title and
+author, and a get_text() pass. Also reports how often the title, author and
+date agree with the previous code.
+
+Usage:
+    python benchmarks/bench_html_extractor.py --corpus DIR [--repeat N]
+
+DIR is a directory of saved pages (*.html, *.htm). Without --corpus a small
+synthetic corpus is generated, which is only useful as a smoke test.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools'))
+
+from html_metadata import parse_page, available_backends
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+def legacy_find_publish_date(soup):
+    date_meta_tags = [
+        'article:published_time',
+        'datePublished',
+        'date',
+        'pubdate',
+        'publishdate',
+        'og:published_time'
+    ]
+
+    for tag in date_meta_tags:
+        date = soup.find('meta', property=tag) or soup.find('meta', attrs={'name': tag})
+        if date and date.get('content'):
+            return date['content']
+
+    time_tag = soup.find('time')
+    if time_tag and time_tag.get('datetime'):
+        return time_tag['datetime']
+
+    return 'Not available'
+
+def legacy_find_title(soup):
+    article_title = soup.find('h1')
+    if article_title:
+        return article_title.get_text(strip=True)
+
+    if soup.title and soup.title.string:
+        return soup.title.string.strip()
+
+    return 'Not available'
+
+def legacy_find_author(soup):
+    author_elements = [
+        soup.find('meta', property='author'),
+        soup.find('meta', attrs={'name': 'author'}),
+        soup.find(class_='author'),
+        soup.find(attrs={'rel': 'author'}),
+        soup.find('a', class_='author')
+    ]
+
+    for element in author_elements:
+        if element:
+            if element.get('content'):
+                return element['content']
+            return element.get_text(strip=True)
+
+    return 'Not available'
+
+def legacy_extract(html):
+    """What WebsiteAnalyzer.run did with a page before the single-pass extractor"""
+    soup = BeautifulSoup(html, 'html.parser')
+    return {
+        'published_date': legacy_find_publish_date(soup),
+        'title': legacy_find_title(soup),
+        'author': legacy_find_author(soup),
+        'text': soup.get_text(separator=' ', strip=True)
+    }
+
+def synthetic_corpus(count=50):
+    paragraph = "<p>Performance matters, and parsing a page once is cheaper than parsing it five times. " * 4 + "</p>"
+    pages = []
+    for i in range(count):
+        pages.append(
+            f"<html><head><title>Article {i}</title>"
+            f"<meta property='article:published_time' content='2024-01-{i % 28 + 1:02d}'>"
+            f"<script>var tracking = {i};</script><style>p {{ margin: 0 }}</style></head>"
+            f"<body><nav>{'<a href=/x>link</a> ' * 30}</nav>"
+            f"<article><h1>Headline {i}</h1><span class='author'>Writer {i}</span>"
+            f"{paragraph * (20 + i % 10)}</article><footer>Footer</footer></body></html>"
+        )
+    return pages
+
+def load_corpus(directory):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.htm*'))):
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            pages.append(f.read())
+    return pages
+
+def time_run(fn, pages, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages:
+            fn(html)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def normalize(value):
+    return ' '.join((value or 'Not available').split())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', help='Directory of saved HTML pages')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per extractor, the best one is reported')
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus) if args.corpus else synthetic_corpus()
+    if not pages:
+        sys.exit(f"No *.html or *.htm files in {args.corpus}")
+    total_mb = sum(len(html) for html in pages) / 1e6
+    print(f"{len(pages)} pages, {total_mb:.1f} MB{'' if args.corpus else ' (synthetic)'}")
+
+    runs = {}
+    if BeautifulSoup is not None:
+        runs['bs4 html.parser + find()'] = legacy_extract
+    else:
+        print("beautifulsoup4 is not installed, skipping the previous implementation")
+    for backend in available_backends():
+        runs[f'single pass ({backend})'] = lambda html, backend=backend: parse_page(html, backend)
+
+    baseline = None
+    for label, fn in runs.items():
+        seconds = time_run(fn, pages, args.repeat)
+        per_page = seconds / len(pages) * 1000
+        baseline = baseline or per_page
+        print(f"{label:30s} {per_page:8.2f} ms/page  {baseline / per_page:5.2f}x")
+
+    if BeautifulSoup is not None:
+        agreement = {'title': 0, 'author': 0, 'published_date': 0}
+        for html in pages:
+            legacy = legacy_extract(html)
+            current = parse_page(html)
+            for field in agreement:
+                agreement[field] += normalize(legacy[field]) == normalize(current[field])
+        print("agreement with previous code: " + ", ".join(
+            f"{field} {count}/{len(pages)}" for field, count in agreement.items()
+        ))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Startup-time benchmark for importing the agent tools.
+
+Each tool module is imported in a fresh interpreter, which is what an agent
+pays at startup. It is timed twice:
+
+  lazy   import only. Clients and models are built on first use.
+  eager  import followed by lazy_resources.prewarm(). This builds every
+         client and model the tool registered, which is the work the tools
+         used to do at import time.
+
+Usage: python benchmarks/bench_tool_import.py [--repeat N] [module ...]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools')
+
+DEFAULT_MODULES = [
+    'notion_database_retriever',
+    'notion_content_pusher',
+    'website_analyzer',
+    'instagram_analyzer',
+    'text_analyzer',
+    'video_processor',
+    'social_video_processor',
+]
+
+SNIPPET = """
+import time
+start = time.perf_counter()
+import {module}
+if {prewarm}:
+    import lazy_resources
+    lazy_resources.prewarm()
+print(time.perf_counter() - start)
+"""
+
+def time_import(module, prewarm):
+    """Import a module in a fresh interpreter and return seconds, or an error string"""
+    result = subprocess.run(
+        [sys.executable, '-c', SNIPPET.format(module=module, prewarm=prewarm)],
+        cwd=TOOLS_DIR,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        return result.stderr.strip().splitlines()[-1]
+    return float(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='Fresh interpreters per measurement')
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES)
+    args = parser.parse_args()
+
+    print(f"{'module':30s} {'lazy (s)':>10s} {'eager (s)':>10s}")
+    for module in args.modules:
+        row = []
+        for prewarm in (False, True):
+            samples = [time_import(module, prewarm) for _ in range(args.repeat)]
+            errors = [sample for sample in samples if isinstance(sample, str)]
+            if errors:
+                row.append(None)
+                error = errors[0]
+            else:
+                row.append(statistics.median(samples))
+
+        if None in row:
+            print(f"{module:30s} skipped: {error}")
+        else:
+            print(f"{module:30s} {row[0]:10.3f} {row[1]:10.3f}")
+
+if __name__ == "__main__":
+    main()
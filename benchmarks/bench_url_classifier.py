@@ -0,0 +1,122 @@
+"""
+Micro-benchmark of the URL classifier used by NotionDatabaseRetriever.
+
+Compares the per-URL cost of the compiled host-dispatch classifier in
+tools/url_classifier.py with the regex-per-call implementation it replaced,
+and checks that both agree on a mixed corpus of links.
+
+Usage: python benchmarks/bench_url_classifier.py [--count N]
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools'))
+
+from url_classifier import classify_link, classify_many
+
+def legacy_identify_content_type(link, name=''):
+    """Copy of the regex-per-call classifier the retriever used before url_classifier"""
+    # Check for quoted text first
+    if name and name.startswith('"') and name.endswith('"'):
+        return {'type': 'text', 'platform': 'text'}
+
+    # Check for empty/missing link
+    if not link:
+        # Only return unknown if we don't have a text entry
+        return {'type': 'unknown', 'platform': 'unknown'}
+
+    link_lower = link.lower()
+
+    # YouTube patterns
+    youtube_patterns = {
+        'watch': r'youtube\.com/watch\?v=[\w-]+',
+        'shorts': r'youtube\.com/shorts/[\w-]+',
+        'youtu.be': r'youtu\.be/[\w-]+'
+    }
+
+    # Instagram patterns
+    instagram_patterns = {
+        'reel': r'instagram\.com/reels?/[\w-]+',
+        'post': r'instagram\.com/p/[\w-]+',
+        'tv': r'instagram\.com/tv/[\w-]+'
+    }
+
+    # TikTok patterns
+    tiktok_patterns = {
+        'video': r'tiktok\.com/.+/video/[\w-]+',
+        'vm': r'vm\.tiktok\.com/[\w-]+'
+    }
+
+    # Check YouTube
+    for pattern in youtube_patterns.values():
+        if re.search(pattern, link_lower):
+            return {'type': 'video', 'platform': 'youtube'}
+
+    # Check Facebook
+    if 'facebook.com' in link_lower:
+        return {'type': 'manual_processing', 'platform': 'facebook'}
+
+    # Check Instagram
+    for key, pattern in instagram_patterns.items():
+        if re.search(pattern, link_lower):
+            if key in ['reel', 'tv']:
+                return {'type': 'video', 'platform': 'instagram'}
+            return {'type': 'website', 'platform': 'instagram'}
+
+    # Check TikTok
+    for pattern in tiktok_patterns.values():
+        if re.search(pattern, link_lower):
+            return {'type': 'video', 'platform': 'tiktok'}
+
+    return {'type': 'website', 'platform': 'web'}
+
+SAMPLE_LINKS = [
+    'https://www.youtube.com/watch?v=Og73plUTabs',
+    'https://youtube.com/shorts/abc123XYZ',
+    'https://youtu.be/Og73plUTabs',
+    'https://m.youtube.com/watch?v=Og73plUTabs&t=10s',
+    'https://www.instagram.com/reel/DBy1aprRNXe/?utm_source=ig_web_copy_link',
+    'https://www.instagram.com/p/DBtGC0bAGFq/',
+    'https://www.instagram.com/tv/CdEf123/',
+    'https://www.tiktok.com/@someone/video/7234567890123456789',
+    'https://vm.tiktok.com/ZMabc123/',
+    'https://www.facebook.com/watch/?v=123456789',
+    'https://example.com/blog/how-to-write-fast-python',
+    'https://news.ycombinator.com/item?id=123456',
+    'https://docs.python.org/3/library/re.html',
+    'instagram.com/p/DBtGC0bAGFq/',
+]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=100000, help='Number of links to classify per run')
+    args = parser.parse_args()
+
+    for link in SAMPLE_LINKS:
+        legacy = legacy_identify_content_type(link)
+        compiled = classify_link(link)
+        if legacy != compiled:
+            print(f"MISMATCH {link}: legacy={legacy} compiled={compiled}")
+
+    corpus = (SAMPLE_LINKS * (args.count // len(SAMPLE_LINKS) + 1))[:args.count]
+    # Make most links distinct so classify_many cannot just reuse results
+    corpus = [f"{link}{'&' if '?' in link else '?'}n={i}" if i % 4 else link for i, link in enumerate(corpus)]
+
+    runs = {
+        'legacy (re.search per call)': lambda: [legacy_identify_content_type(link) for link in corpus],
+        'classify_link': lambda: [classify_link(link) for link in corpus],
+        'classify_many': lambda: classify_many(corpus),
+    }
+
+    baseline = None
+    for label, fn in runs.items():
+        seconds = min(timeit.repeat(fn, number=1, repeat=5))
+        per_url = seconds / len(corpus) * 1e9
+        baseline = baseline or per_url
+        print(f"{label:30s} {per_url:8.0f} ns/url  {baseline / per_url:5.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Per-item latency of SocialVideoProcessor transcription, before and after the
+process-wide Whisper model pool.
+
+  before  every tool instance loads its own model (whisper.load_model in
+          __init__, as the tool used to), then transcribes
+  cold    first call through tools/whisper_pool.py, which loads the model
+  pooled  later calls through the pool, the model is already loaded
+
+Only the transcription step is timed, the download and audio extraction
+the tool also does are the same either way. Needs openai-whisper.
+
+Usage:
+    python benchmarks/bench_whisper_pool.py [--audio FILE] [--size base] [--items N]
+
+Without --audio a few seconds of synthetic tone are transcribed.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools'))
+
+try:
+    import whisper
+except ImportError:
+    whisper = None
+
+def synthetic_audio(seconds=5):
+    import numpy as np
+    t = np.arange(int(seconds * whisper.audio.SAMPLE_RATE)) / whisper.audio.SAMPLE_RATE
+    return (0.1 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+def run_before(audio, size, items):
+    """A fresh model per item, like the tool did in __init__"""
+    samples = []
+    for _ in range(items):
+        start = time.perf_counter()
+        model = whisper.load_model(size)
+        model.transcribe(audio, fp16=False)
+        samples.append(time.perf_counter() - start)
+        del model
+    return samples
+
+def run_pooled(audio, size, items):
+    """Through the pool: the first call loads the model, later ones reuse it"""
+    import whisper_pool
+
+    samples = []
+    for _ in range(items + 1):
+        start = time.perf_counter()
+        whisper_pool.transcribe(audio, size, fp16=False)
+        samples.append(time.perf_counter() - start)
+    return samples[0], samples[1:]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--audio', help='Audio or video file to transcribe')
+    parser.add_argument('--size', default='base', help='Whisper model size')
+    parser.add_argument('--items', type=int, default=5, help='Items per measurement')
+    args = parser.parse_args()
+
+    if whisper is None:
+        sys.exit("openai-whisper is not installed")
+
+    audio = args.audio or synthetic_audio()
+    print(f"model {args.size}, {args.items} items, audio: {args.audio or 'synthetic 5 s tone'}")
+
+    before = run_before(audio, args.size, args.items)
+    cold, pooled = run_pooled(audio, args.size, args.items)
+
+    print(f"{'before (load per item)':26s} {statistics.median(before):8.2f} s/item")
+    print(f"{'pool, first call':26s} {cold:8.2f} s")
+    print(f"{'pool, later calls':26s} {statistics.median(pooled):8.2f} s/item  "
+          f"{statistics.median(before) / statistics.median(pooled):5.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+"""
+Single-pass extraction of page metadata and visible text from HTML.
+
+A PageCollector receives start/end/data events and picks up the title,
+author, publication date and visible text in the same walk over the
+document, instead of searching the parsed tree once per field. In that same
+walk it scores elements the way Readability does, by paragraph text and
+link density, to find the main content of the page without an LLM. The
+events come from a pluggable parser backend:
+
+  lxml         lxml's C parser driving the collector as a parser target
+  html.parser  the standard library HTMLParser, always available
+
+Both backends accept the document in chunks through PageParser.feed(), so a
+page can be parsed while it is still being downloaded.
+"""
+import os
+import re
+from html.parser import HTMLParser
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+# Meta tags holding the publication date, in order of preference
+DATE_META_TAGS = [
+    'article:published_time',
+    'datePublished',
+    'date',
+    'pubdate',
+    'publishdate',
+    'og:published_time'
+]
+
+# Elements whose text is not part of the visible page
+SKIPPED_ELEMENTS = {'script', 'style', 'template'}
+
+# Elements that never have children or an end tag
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr'
+}
+
+# Author candidates, in order of preference
+AUTHOR_META_PROPERTY, AUTHOR_META_NAME, AUTHOR_CLASS, AUTHOR_REL = range(4)
+
+# Elements that start a new block of text
+BLOCK_ELEMENTS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt',
+    'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table',
+    'td', 'th', 'tr', 'ul'
+}
+
+# Elements whose text is scored as a paragraph of content
+PARAGRAPH_ELEMENTS = {'p', 'pre', 'td', 'blockquote'}
+
+# Paragraphs shorter than this do not count towards their container
+MIN_PARAGRAPH_LENGTH = 25
+
+# Starting score of a content candidate by tag, as in Readability
+TAG_SCORES = {
+    'article': 10, 'main': 10, 'div': 5, 'section': 3, 'pre': 3, 'td': 3, 'blockquote': 3,
+    'address': -3, 'ol': -3, 'ul': -3, 'dl': -3, 'dd': -3, 'dt': -3, 'li': -3, 'form': -3,
+    'h1': -5, 'h2': -5, 'h3': -5, 'h4': -5, 'h5': -5, 'h6': -5, 'th': -5
+}
+
+# class/id hints that an element holds (or does not hold) the main content
+POSITIVE_HINTS = re.compile(r'article|body|content|entry|main|page|post|text|blog|story', re.IGNORECASE)
+NEGATIVE_HINTS = re.compile(
+    r'banner|comment|contact|footer|footnote|masthead|meta|promo|related|share|'
+    r'sidebar|sponsor|shopping|tags|widget|nav|menu|cookie|social|ad-',
+    re.IGNORECASE
+)
+
+# Main content this long (in characters) counts as a full article
+CONFIDENT_LENGTH = 1000
+
+# Candidate score at which the choice of main content is considered certain
+CONFIDENT_SCORE = 40
+
+class PageCollector:
+    """Collects title, author, date and visible text from parser events"""
+
+    def __init__(self):
+        self.text_chunks = []
+        self.text_length = 0
+        self._pending = []
+        self._stack = []
+        # Content scoring: every element is [tag, parent, first chunk,
+        # end chunk, class and id], and running sums over the text chunks give
+        # the text length, link text length and commas of any element
+        self._nodes = []
+        self._node_stack = []
+        self._scores = {}
+        self._text_sums = [0]
+        self._link_sums = [0]
+        self._comma_sums = [0]
+        self._chunk_breaks = []
+        self._break_pending = False
+        self._link_depth = 0
+        self._skip_depth = 0
+        self._captures = []
+        self._date_meta = {}
+        self._time_datetime = None
+        self._time_seen = False
+        self._title = None
+        self._h1 = None
+        self._authors = {}
+
+    def _capture(self, key):
+        """Start collecting the text of the element that was just opened"""
+        parts = []
+        self._captures.append((len(self._stack), key, parts))
+        return parts
+
+    def _finish_capture(self, key, parts):
+        text = ' '.join(parts)
+        if key == 'title':
+            self._title = text
+        elif key == 'h1':
+            self._h1 = text
+        elif self._authors.get(key) is None:
+            self._authors[key] = text
+
+    def start(self, tag, attrs):
+        self._flush_text()
+        attrs = {name: value or '' for name, value in attrs.items()}
+
+        if tag == 'meta':
+            self._start_meta(attrs)
+        elif tag == 'time' and not self._time_seen:
+            self._time_seen = True
+            self._time_datetime = attrs.get('datetime') or None
+
+        is_void = tag in VOID_ELEMENTS
+        if tag in BLOCK_ELEMENTS:
+            self._break_pending = True
+        if not is_void:
+            self._stack.append(tag)
+            self._node_stack.append(len(self._nodes))
+            self._nodes.append([
+                tag,
+                self._node_stack[-2] if len(self._node_stack) > 1 else None,
+                len(self.text_chunks),
+                None,
+                f"{attrs.get('class', '')} {attrs.get('id', '')}"
+            ])
+            if tag == 'a':
+                self._link_depth += 1
+
+        # Author from class="author" or rel="author", content attribute first
+        classes = attrs.get('class', '').split()
+        for rank, matches in ((AUTHOR_CLASS, 'author' in classes),
+                              (AUTHOR_REL, 'author' in attrs.get('rel', '').split())):
+            if matches and rank not in self._authors:
+                if attrs.get('content') or is_void:
+                    self._authors[rank] = attrs.get('content', '')
+                else:
+                    self._authors[rank] = None
+                    self._capture(rank)
+
+        if is_void:
+            return
+
+        if tag in SKIPPED_ELEMENTS:
+            self._skip_depth += 1
+        elif tag == 'title' and self._title is None:
+            self._title = ''
+            self._capture('title')
+        elif tag == 'h1' and self._h1 is None:
+            self._h1 = ''
+            self._capture('h1')
+
+    def _start_meta(self, attrs):
+        content = attrs.get('content', '')
+        for attr in ('property', 'name'):
+            value = attrs.get(attr)
+            if value in DATE_META_TAGS:
+                self._date_meta.setdefault((attr, value), content)
+
+        if attrs.get('property') == 'author':
+            self._authors.setdefault(AUTHOR_META_PROPERTY, content)
+        if attrs.get('name') == 'author':
+            self._authors.setdefault(AUTHOR_META_NAME, content)
+
+    def end(self, tag):
+        self._flush_text()
+        if tag in VOID_ELEMENTS or tag not in self._stack:
+            return
+
+        # Close everything up to the matching element, like browsers do
+        while self._stack:
+            if self._pop_element() == tag:
+                break
+
+    def _pop_element(self):
+        """Close the innermost open element and return its tag"""
+        closed = self._stack.pop()
+        node_id = self._node_stack.pop()
+        node = self._nodes[node_id]
+        node[3] = len(self.text_chunks)
+        
+        if closed in SKIPPED_ELEMENTS:
+            self._skip_depth -= 1
+        elif closed == 'a':
+            self._link_depth -= 1
+        elif closed in PARAGRAPH_ELEMENTS:
+            self._score_paragraph(node)
+        if closed in BLOCK_ELEMENTS:
+            self._break_pending = True
+        
+        while self._captures and self._captures[-1][0] > len(self._stack):
+            _, key, parts = self._captures.pop()
+            self._finish_capture(key, parts)
+        return closed
+
+    def _score_paragraph(self, node):
+        """Credit a paragraph's text to its parent and, by half, its grandparent"""
+        _, parent, start, end, _ = node
+        length = self._text_sums[end] - self._text_sums[start]
+        if length < MIN_PARAGRAPH_LENGTH or parent is None:
+            return
+        
+        score = 1 + (self._comma_sums[end] - self._comma_sums[start]) + min(length // 100, 3)
+        for node_id, share in ((parent, 1.0), (self._nodes[parent][1], 0.5)):
+            if node_id is None:
+                break
+            if node_id not in self._scores:
+                self._scores[node_id] = self._initial_score(self._nodes[node_id])
+            self._scores[node_id] += score * share
+
+    @staticmethod
+    def _initial_score(node):
+        tag, _, _, _, hints = node
+        score = TAG_SCORES.get(tag, 0)
+        if hints.strip():
+            if NEGATIVE_HINTS.search(hints):
+                score -= 25
+            if POSITIVE_HINTS.search(hints):
+                score += 25
+        return score
+
+    def data(self, text):
+        # A text node can arrive in several pieces when the page is fed in
+        # chunks, so it is only processed once the next tag starts
+        if not self._skip_depth:
+            self._pending.append(text)
+
+    def _flush_text(self):
+        if not self._pending:
+            return
+        text = ''.join(self._pending).strip()
+        self._pending = []
+        if not text:
+            return
+
+        self.text_chunks.append(text)
+        self.text_length += len(text) + 1
+        for _, _, parts in self._captures:
+            parts.append(text)
+        
+        self._text_sums.append(self._text_sums[-1] + len(text))
+        self._link_sums.append(self._link_sums[-1] + (len(text) if self._link_depth else 0))
+        self._comma_sums.append(self._comma_sums[-1] + text.count(','))
+        self._chunk_breaks.append(self._break_pending)
+        self._break_pending = False
+
+    def close(self):
+        """Finish open elements and return the collected metadata"""
+        self._flush_text()
+        while self._stack:
+            self._pop_element()
+        while self._captures:
+            _, key, parts = self._captures.pop()
+            self._finish_capture(key, parts)
+        return self.result()
+
+    def _link_density(self, node):
+        start, end = node[2], node[3]
+        length = self._text_sums[end] - self._text_sums[start]
+        if not length:
+            return 1.0
+        return (self._link_sums[end] - self._link_sums[start]) / length
+
+    def main_content(self):
+        """
+        Return (main content text, confidence between 0 and 1).
+
+        The best scoring element, discounted by its link density, is taken as
+        the main content together with well-scoring siblings. Confidence
+        drops for short results, link-heavy results and low scores.
+        """
+        if not self._scores:
+            return '', 0.0
+        
+        final = {
+            node_id: score * (1 - self._link_density(self._nodes[node_id]))
+            for node_id, score in self._scores.items()
+        }
+        best_id = max(final, key=final.get)
+        best_score = final[best_id]
+        if best_score <= 0:
+            return '', 0.0
+        
+        # Siblings such as consecutive article sections also belong to the content
+        parent = self._nodes[best_id][1]
+        threshold = max(10, best_score * 0.2)
+        selected = [
+            node_id for node_id, score in final.items()
+            if node_id == best_id or (parent is not None and self._nodes[node_id][1] == parent and score >= threshold)
+        ]
+        
+        parts = []
+        covered_until = 0
+        for node_id in sorted(selected, key=lambda n: self._nodes[n][2]):
+            start, end = self._nodes[node_id][2], self._nodes[node_id][3]
+            for position in range(max(start, covered_until), end):
+                if parts and self._chunk_breaks[position]:
+                    parts.append('\n\n')
+                elif parts:
+                    parts.append(' ')
+                parts.append(self.text_chunks[position])
+            covered_until = max(covered_until, end)
+        content = ''.join(parts)
+        
+        link_density = self._link_density(self._nodes[best_id])
+        confidence = (
+            min(1.0, len(content) / CONFIDENT_LENGTH)
+            * (1 - link_density)
+            * (0.5 + 0.5 * min(1.0, best_score / CONFIDENT_SCORE))
+        )
+        return content, round(confidence, 3)
+
+    def result(self):
+        published_date = None
+        for tag in DATE_META_TAGS:
+            content = self._date_meta.get(('property', tag))
+            if content is None:
+                content = self._date_meta.get(('name', tag))
+            if content:
+                published_date = content
+                break
+        if published_date is None:
+            published_date = self._time_datetime
+
+        author = None
+        for rank in sorted(self._authors):
+            author = self._authors[rank]
+            break
+
+        main_content, confidence = self.main_content()
+
+        return {
+            'title': self._h1 if self._h1 is not None else self._title,
+            'author': author,
+            'published_date': published_date,
+            'text': ' '.join(self.text_chunks),
+            'main_content': main_content,
+            'main_content_confidence': confidence
+        }
+
+class _StdlibDriver(HTMLParser):
+    """Feeds HTMLParser events into a PageCollector"""
+
+    def __init__(self, collector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+        self.collector.end(tag)
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+class _LxmlTarget:
+    """Parser target adapting lxml's events to a PageCollector"""
+
+    def __init__(self, collector):
+        self.collector = collector
+
+    def start(self, tag, attrib):
+        if isinstance(tag, str):
+            self.collector.start(tag, dict(attrib))
+
+    def end(self, tag):
+        if isinstance(tag, str):
+            self.collector.end(tag)
+
+    def data(self, data):
+        self.collector.data(data)
+
+    def close(self):
+        return None
+
+def available_backends():
+    """Names of the parser backends usable in this environment"""
+    return (['lxml'] if etree is not None else []) + ['html.parser']
+
+DEFAULT_BACKEND = os.getenv("HTML_PARSER_BACKEND") or available_backends()[0]
+
+class PageParser:
+    """
+    Incremental page parser.
+
+        parser = PageParser()
+        for chunk in chunks:
+            parser.feed(chunk)
+        page = parser.close()
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or DEFAULT_BACKEND
+        self.collector = PageCollector()
+
+        if self.backend == 'lxml':
+            if etree is None:
+                raise ValueError("The lxml backend needs the lxml package")
+            self._parser = etree.HTMLParser(target=_LxmlTarget(self.collector))
+        elif self.backend == 'html.parser':
+            self._parser = _StdlibDriver(self.collector)
+        else:
+            raise ValueError(f"Unknown HTML parser backend: {self.backend}")
+
+    @property
+    def text_length(self):
+        """Approximate number of visible characters collected so far"""
+        return self.collector.text_length
+
+    def feed(self, chunk):
+        self._parser.feed(chunk)
+
+    def close(self):
+        self._parser.close()
+        return self.collector.close()
+
+def parse_page(html, backend=None):
+    """Extract title, author, published_date and text from a whole document"""
+    parser = PageParser(backend)
+    parser.feed(html)
+    return parser.close()
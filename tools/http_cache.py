@@ -0,0 +1,259 @@
+"""
+On-disk HTTP cache for page fetches.
+
+Responses are stored in SQLite under their normalized URL, with bodies
+zlib-compressed, and reused according to Cache-Control, Expires, ETag and
+Last-Modified: fresh entries are served without a request, stale ones are
+revalidated with a conditional GET so an unchanged page costs a 304. The
+cache is bounded by the compressed size of its bodies and evicts the least
+recently used entries first.
+
+Requests go through page_fetcher, which looks entries up, revalidates them
+and stores responses here. Entries can be partial, when a bounded fetch
+stopped reading early.
+"""
+import os
+import re
+import json
+import time
+import zlib
+import sqlite3
+import tempfile
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_HTTP_CACHE_DB = os.getenv(
+    "WEBSITE_HTTP_CACHE_DB",
+    os.path.join(tempfile.gettempdir(), "website_http_cache.sqlite3")
+)
+DEFAULT_HTTP_CACHE_MAX_BYTES = int(os.getenv("WEBSITE_HTTP_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# Freshness of responses without explicit lifetime: a fraction of the time
+# since Last-Modified, capped (RFC 9111 heuristic freshness)
+HEURISTIC_FRACTION = 0.1
+HEURISTIC_MAX_AGE = 24 * 60 * 60
+
+# Query parameters that only track the visitor and do not change the page
+TRACKING_PARAMS = re.compile(r'^(utm_[a-z]+|fbclid|gclid|mc_cid|mc_eid|igshid|ref_src)$', re.IGNORECASE)
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+_CACHE_CONTROL_DIRECTIVE = re.compile(r'([a-z-]+)\s*(?:=\s*"?([^",]*)"?)?', re.IGNORECASE)
+
+def normalize_url(url):
+    """Cache key for a URL: lowercase scheme and host, no default port, fragment or tracking parameters, sorted query"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not TRACKING_PARAMS.match(key)
+    ))
+    return urlunsplit((scheme, host, parts.path or '/', query, ''))
+
+def parse_cache_control(value):
+    """Parse a Cache-Control header into {directive: value or True}"""
+    directives = {}
+    for name, argument in _CACHE_CONTROL_DIRECTIVE.findall(value or ''):
+        directives[name.lower()] = argument if argument else True
+    return directives
+
+def _http_date(value):
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+def freshness_lifetime(headers, now=None):
+    """Seconds a response may be reused without revalidation, None if it must not be stored"""
+    directives = parse_cache_control(headers.get('Cache-Control'))
+    if 'no-store' in directives:
+        return None
+    if 'no-cache' in directives:
+        return 0
+
+    for name in ('s-maxage', 'max-age'):
+        if name in directives:
+            try:
+                return max(0, int(directives[name]))
+            except (TypeError, ValueError):
+                return 0
+
+    now = now or time.time()
+    date = _http_date(headers.get('Date')) or now
+    expires = headers.get('Expires')
+    if expires is not None:
+        expires_at = _http_date(expires)
+        return max(0, int(expires_at - date)) if expires_at else 0
+
+    last_modified = _http_date(headers.get('Last-Modified'))
+    if last_modified:
+        return int(min(HEURISTIC_MAX_AGE, max(0, date - last_modified) * HEURISTIC_FRACTION))
+    return 0
+
+class HttpCache:
+    """SQLite-backed HTTP cache with conditional revalidation and LRU eviction"""
+
+    def __init__(self, path=DEFAULT_HTTP_CACHE_DB, max_bytes=DEFAULT_HTTP_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, "
+                    "url TEXT NOT NULL, "
+                    "headers TEXT NOT NULL, "
+                    "encoding TEXT, "
+                    "body BLOB NOT NULL, "
+                    "size INTEGER NOT NULL, "
+                    "etag TEXT, "
+                    "last_modified TEXT, "
+                    "expires_at REAL NOT NULL, "
+                    "last_used_at REAL NOT NULL, "
+                    "complete INTEGER NOT NULL DEFAULT 1)"
+                )
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(responses)")}
+                if 'complete' not in columns:
+                    conn.execute("ALTER TABLE responses ADD COLUMN complete INTEGER NOT NULL DEFAULT 1")
+                conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_used_at)")
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def lookup(self, url):
+        """Return the cached entry for a URL as a dict, or None"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT url, headers, encoding, body, etag, last_modified, expires_at, complete "
+                "FROM responses WHERE key = ?",
+                (normalize_url(url),)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+
+        cached_url, headers, encoding, body, etag, last_modified, expires_at, complete = row
+        return {
+            'url': cached_url,
+            'headers': json.loads(headers),
+            'encoding': encoding,
+            'body': body,
+            'etag': etag,
+            'last_modified': last_modified,
+            'expires_at': expires_at,
+            'complete': bool(complete)
+        }
+
+    @staticmethod
+    def decompress(entry):
+        return zlib.decompress(entry['body'])
+
+    @staticmethod
+    def conditional_headers(entry):
+        """Validators to send when revalidating a stale entry"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, headers, content, encoding=None, complete=True):
+        """Store a 200 response unless its headers forbid it. complete=False marks a body cut short."""
+        lifetime = freshness_lifetime(headers)
+        if lifetime is None:
+            return False
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        # Nothing to gain from an entry that is stale at once and cannot be revalidated
+        if not lifetime and not etag and not last_modified:
+            return False
+
+        body = zlib.compress(content, 6)
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses "
+                    "(key, url, headers, encoding, body, size, etag, last_modified, expires_at, last_used_at, complete) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        normalize_url(url), url,
+                        json.dumps(dict(headers)),
+                        encoding, body, len(body), etag, last_modified, now + lifetime, now, int(complete)
+                    )
+                )
+            self._evict(conn)
+        finally:
+            conn.close()
+        return True
+
+    def refresh(self, url, headers):
+        """Extend a cached entry after a 304, taking over any updated validators"""
+        lifetime = freshness_lifetime(headers) or 0
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "UPDATE responses SET expires_at = ?, last_used_at = ?, "
+                    "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE key = ?",
+                    (now + lifetime, now, headers.get('ETag'), headers.get('Last-Modified'), normalize_url(url))
+                )
+        finally:
+            conn.close()
+
+    def touch(self, url):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "UPDATE responses SET last_used_at = ? WHERE key = ?",
+                    (time.time(), normalize_url(url))
+                )
+        finally:
+            conn.close()
+
+    def _evict(self, conn):
+        """Drop least recently used entries until the bodies fit in max_bytes"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        with conn:
+            for key, size in conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_used_at"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                total -= size
+
+    def stats(self):
+        """Entry count, compressed size and this instance's hit counters"""
+        conn = self._connect()
+        try:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        finally:
+            conn.close()
+        return {
+            'entries': entries,
+            'bytes': size,
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'misses': self.misses
+        }
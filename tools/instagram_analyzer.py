@@ -5,13 +5,31 @@ import os
 from dotenv import load_dotenv
 import re
 from typing import Optional, ClassVar
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from .lazy_resources import lazy_resource
+    from .llm_cache import chat_completion
+except ImportError:
+    from lazy_resources import lazy_resource
+    from llm_cache import chat_completion
 
 load_dotenv()
 
-client = OpenAI(
-    api_key=os.environ.get("OPENAI_API_KEY"),
-)
+def _create_openai_client():
+    # Imported here so loading the tool does not pay for the OpenAI SDK
+    from openai import OpenAI
+    return OpenAI(
+        api_key=os.environ.get("OPENAI_API_KEY"),
+    )
+
+client = lazy_resource("openai", _create_openai_client)
+
+# Item kind of this tool's requests in an LLMBatchJob
+BATCH_KIND = "instagram"
+
+# Posts fetched at once when preparing a batch, Instagram rate-limits hard
+DEFAULT_MAX_FETCH_WORKERS = 2
 
 class InstagramAnalyzer(BaseTool):
     """
@@ -21,6 +39,10 @@ class InstagramAnalyzer(BaseTool):
         ..., 
         description="The complete data object from the Notion Retriever"
     )
+    use_llm_cache: bool = Field(
+        default=True,
+        description="Answer repeated GPT requests from the shared local response cache"
+    )
     
     _loader: ClassVar[Optional[instaloader.Instaloader]] = None
     
@@ -46,15 +68,14 @@ class InstagramAnalyzer(BaseTool):
         
         return InstagramAnalyzer._loader
 
-    def _analyze_content(self, content):
-        """Analyze content using GPT-4o-mini"""
-        try:
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """Extract the following from this Instagram post:
+    def _analysis_request(self, content):
+        """Chat request analyzing a post caption with GPT-4o-mini"""
+        return dict(
+            model="gpt-4o-mini",
+            messages=[
+                {
+                    "role": "system",
+                    "content": """Extract the following from this Instagram post:
                         1. Title: Create a title based on the content
                         2. Description: Summarize the main message
                         3. Content: Key points or themes
@@ -65,90 +86,163 @@ class InstagramAnalyzer(BaseTool):
                         Description: [description]
                         Content: [content]
                         Keywords: [keyword1, keyword2, ...]"""
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Analyze this Instagram content:\n{content}"
-                    }
-                ],
-                temperature=0.3,
-                max_tokens=500
+                },
+                {
+                    "role": "user",
+                    "content": f"Analyze this Instagram content:\n{content}"
+                }
+            ],
+            temperature=0.3,
+            max_tokens=500
+        )
+
+    @staticmethod
+    def _parse_analysis(response_text):
+        """Parse the response into a dictionary"""
+        result = {}
+        
+        for line in response_text.split('\n'):
+            if ':' in line:
+                key, value = line.split(':', 1)
+                key = key.strip().lower()
+                value = value.strip()
+                # Convert keywords string to list
+                if key == 'keywords':
+                    value = [k.strip() for k in value.strip('[]').split(',')]
+                result[key] = value if value else 'Not available'
+        
+        return result
+
+    @staticmethod
+    def _analysis_error(error):
+        return {
+            'title': 'Error in analysis',
+            'description': 'Not available',
+            'content': f'Error analyzing content: {error}',
+            'keywords': []
+        }
+
+    def _analyze_content(self, content):
+        """Analyze content using GPT-4o-mini"""
+        try:
+            response_text = chat_completion(
+                client,
+                use_cache=self.use_llm_cache,
+                **self._analysis_request(content)
             )
-            
-            # Parse the response into a dictionary
-            result = {}
-            response_text = response.choices[0].message.content
-            
-            for line in response_text.split('\n'):
-                if ':' in line:
-                    key, value = line.split(':', 1)
-                    key = key.strip().lower()
-                    value = value.strip()
-                    # Convert keywords string to list
-                    if key == 'keywords':
-                        value = [k.strip() for k in value.strip('[]').split(',')]
-                    result[key] = value if value else 'Not available'
-            
-            return result
+            return self._parse_analysis(response_text)
             
         except Exception as e:
-            return {
-                'title': 'Error in analysis',
-                'description': 'Not available',
-                'content': f'Error analyzing content: {str(e)}',
-                'keywords': []
-            }
+            return self._analysis_error(str(e))
 
     def run(self):
         try:
-            # Get Instagram URL from retriever data
-            instagram_url = self.retriever_data.get('link')
-            if not instagram_url:
-                raise Exception("No Instagram URL provided")
-
-            shortcode = re.search(r'/p/([^/]+)/', instagram_url)
-            if not shortcode:
-                shortcode = re.search(r'/reel/([^/]+)/', instagram_url)
-            if not shortcode:
-                raise Exception("Invalid Instagram URL")
-            
-            shortcode = shortcode.group(1)
-            post = instaloader.Post.from_shortcode(self.loader.context, shortcode)
-            
-            # Extract hashtags
-            hashtags = []
-            if post.caption:
-                hashtags = re.findall(r'#(\w+)', post.caption)
+            post = self._fetch_post()
             
             # Get AI analysis of content
-            analysis = self._analyze_content(post.caption if post.caption else "")
-            
-            # Ensure keywords is always a list
-            ai_keywords = analysis.get('keywords', [])
-            if isinstance(ai_keywords, str):
-                ai_keywords = [ai_keywords]
-            
-            # Combine AI keywords with hashtags
-            all_keywords = list(set(ai_keywords + hashtags))
+            analysis = self._analyze_content(post['caption'])
             
-            # Create a copy of the original data
-            processed_data = self.retriever_data.copy()
-            
-            # Add processed content
-            processed_data['processed_content'] = {
-                'title': analysis.get('title', 'Instagram post'),
-                'author': post.owner_username,
-                'description': analysis.get('description', 'No description available'),
-                'content': analysis.get('content', 'No content available'),
-                'keywords': all_keywords,
-                'processing_agent': 'Instagram Agent'
-            }
-            
-            return processed_data
+            return self._build_processed_data(self.retriever_data, post, analysis)
 
         except Exception as e:
             return f"Error analyzing Instagram post: {str(e)}"
 
+    @classmethod
+    def prepare_batch(cls, items, job, max_workers=DEFAULT_MAX_FETCH_WORKERS, **options):
+        """
+        Fetch many posts and add their caption analysis requests to an
+        LLMBatchJob, for join_batch() to finish later
+        """
+        def prepare(item):
+            tool = cls(retriever_data=item, **options)
+            try:
+                post = tool._fetch_post()
+                return item, post, tool._analysis_request(post['caption'])
+            except Exception as e:
+                return item, None, f"Error analyzing Instagram post: {str(e)}"
+        
+        if not items:
+            return
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+            prepared = list(executor.map(prepare, items))
+        
+        for item, post, request in prepared:
+            if post is None:
+                job.add(BATCH_KIND, item, error=request)
+            else:
+                job.add(BATCH_KIND, item, context={'post': post}, requests=[request])
+
+    @classmethod
+    def join_batch(cls, job, backend=None):
+        """
+        Results of the items prepare_batch() added to a finished job, in
+        order and as run() would return them
+        """
+        results = []
+        for retriever_data, context, texts, error in job.items(BATCH_KIND, backend):
+            post = context.get('post')
+            if post is None:
+                results.append(error)
+                continue
+            
+            analysis = cls._analysis_error(error) if error else cls._parse_analysis(texts[0])
+            results.append(cls._build_processed_data(retriever_data, post, analysis))
+        return results
+
+    def _fetch_post(self):
+        """Caption, author and hashtags of the post in retriever_data"""
+        # Get Instagram URL from retriever data
+        instagram_url = self.retriever_data.get('link')
+        if not instagram_url:
+            raise Exception("No Instagram URL provided")
+
+        shortcode = re.search(r'/p/([^/]+)/', instagram_url)
+        if not shortcode:
+            shortcode = re.search(r'/reel/([^/]+)/', instagram_url)
+        if not shortcode:
+            raise Exception("Invalid Instagram URL")
+        
+        shortcode = shortcode.group(1)
+        post = instaloader.Post.from_shortcode(self.loader.context, shortcode)
+        
+        # Extract hashtags
+        hashtags = []
+        if post.caption:
+            hashtags = re.findall(r'#(\w+)', post.caption)
+        
+        return {
+            'caption': post.caption if post.caption else "",
+            'author': post.owner_username,
+            'hashtags': hashtags
+        }
+
+    @staticmethod
+    def _build_processed_data(retriever_data, post, analysis):
+        """Combine the post and its analysis into the processed data"""
+        # Ensure keywords is always a list
+        ai_keywords = analysis.get('keywords', [])
+        if isinstance(ai_keywords, str):
+            ai_keywords = [ai_keywords]
+        
+        # Combine AI keywords with hashtags
+        all_keywords = list(set(ai_keywords + post['hashtags']))
+        
+        # Create a copy of the original data
+        processed_data = retriever_data.copy()
+        
+        # Add processed content
+        processed_data['processed_content'] = {
+            'title': analysis.get('title', 'Instagram post'),
+            'author': post['author'],
+            'description': analysis.get('description', 'No description available'),
+            'content': analysis.get('content', 'No content available'),
+            'keywords': all_keywords,
+            'processing_agent': 'Instagram Agent'
+        }
+        
+        return processed_data
+
 if __name__ == "__main__":
     # Test with sample retriever data
     test_data = {
@@ -0,0 +1,113 @@
+"""
+Process-wide registry of expensive clients and models, built on first use.
+
+Tools register a factory under a name at import time, which costs nothing.
+The resource is built the first time it is used, then shared by every tool
+instance and thread in the process. Workers that want to pay the startup
+cost up front can call prewarm().
+
+    notion = lazy_resource("notion", lambda: Client(auth=os.getenv("NOTION_API_KEY")))
+    notion.pages.update(...)   # the client is created here, once
+
+Asyncio clients are the exception: their connection pool belongs to the
+event loop that first used it, so loop_local_resource() builds one instance
+per running loop instead.
+"""
+import asyncio
+import threading
+
+_factories = {}
+_instances = {}
+_locks = {}
+_loop_local = {}
+_registry_lock = threading.Lock()
+
+def register(name, factory):
+    """Register a factory for a named resource. The first registration wins."""
+    with _registry_lock:
+        _factories.setdefault(name, factory)
+        _locks.setdefault(name, threading.Lock())
+
+def get(name):
+    """Return the named resource, building it on first use"""
+    try:
+        return _instances[name]
+    except KeyError:
+        pass
+
+    try:
+        lock = _locks[name]
+    except KeyError:
+        raise KeyError(f"No resource registered under '{name}'") from None
+
+    # Only one thread builds a given resource, the others wait for it
+    with lock:
+        if name not in _instances:
+            _instances[name] = _factories[name]()
+        return _instances[name]
+
+def is_loaded(name):
+    """Tell whether a resource has been built already"""
+    return name in _instances
+
+def prewarm(*names):
+    """Build the given resources now, or every registered resource if none are given"""
+    for name in names or list(_factories):
+        get(name)
+
+class LazyResource:
+    """Stand-in that forwards attribute access to a registered resource"""
+
+    def __init__(self, name):
+        object.__setattr__(self, '_name', name)
+
+    def __getattr__(self, attr):
+        return getattr(get(self._name), attr)
+
+    def __call__(self, *args, **kwargs):
+        return get(self._name)(*args, **kwargs)
+
+    def __repr__(self):
+        state = 'loaded' if is_loaded(self._name) else 'not loaded'
+        return f"<LazyResource '{self._name}' ({state})>"
+
+def lazy_resource(name, factory):
+    """Register a factory and return a stand-in that builds it on first use"""
+    register(name, factory)
+    return LazyResource(name)
+
+class LoopLocalResource:
+    """
+    Stand-in that forwards attribute access to the instance of the running
+    event loop, building it on first use in that loop. Instances of loops
+    that have been closed are dropped.
+    """
+
+    def __init__(self, name, factory):
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_instances', {})
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def get(self):
+        """Return the instance of the running loop. Must be called from a coroutine."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            for closed in [other for other in self._instances if other.is_closed()]:
+                del self._instances[closed]
+            if loop not in self._instances:
+                self._instances[loop] = self._factory()
+            return self._instances[loop]
+
+    def __getattr__(self, attr):
+        return getattr(self.get(), attr)
+
+    def __repr__(self):
+        return f"<LoopLocalResource '{self._name}' ({len(self._instances)} loops)>"
+
+def loop_local_resource(name, factory):
+    """Return the stand-in registered under name, creating it with factory. The first registration wins."""
+    with _registry_lock:
+        if name not in _loop_local:
+            _loop_local[name] = LoopLocalResource(name, factory)
+        return _loop_local[name]
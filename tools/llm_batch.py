@@ -0,0 +1,282 @@
+"""
+Offline batch mode for the analyzers' GPT requests.
+
+Instead of calling the API once per item, analyzers add their requests for
+many items to an LLMBatchJob. The job writes them to a single JSONL file in
+the Batch API format, submits it through a backend and later joins the
+answers back to each item's retriever_data. Everything the job needs is kept
+in its directory (manifest.json and requests.jsonl), so a long batch can be
+collected by a different process than the one that submitted it.
+
+    job = LLMBatchJob("/data/batches/backfill-1")
+    WebsiteAnalyzer.prepare_batch(website_items, job)
+    InstagramAnalyzer.prepare_batch(instagram_items, job)
+    job.submit(OpenAIBatchBackend(client))
+    ...
+    job.wait(backend)
+    processed = WebsiteAnalyzer.join_batch(job, backend) + InstagramAnalyzer.join_batch(job, backend)
+
+Requests already answered in the shared LLM cache are not sent again, and
+batch answers are added to it.
+"""
+import os
+import json
+import time
+import uuid
+import tempfile
+
+try:
+    from .llm_cache import llm_cache, cache_key
+except ImportError:
+    from llm_cache import llm_cache, cache_key
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+DEFAULT_POLL_INTERVAL = 60
+
+# Batch states after which no more results will appear
+TERMINAL_STATES = {'completed', 'failed', 'expired', 'cancelled'}
+
+def _write_json(path, data):
+    """Write JSON atomically so a crash never leaves a truncated file"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def parse_output_line(line):
+    """(custom_id, {'text': ...} or {'error': ...}) from a Batch API output or error line"""
+    record = json.loads(line)
+    response = record.get('response') or {}
+    if record.get('error') or response.get('status_code') != 200:
+        error = record.get('error') or (response.get('body') or {}).get('error') or 'request failed'
+        if isinstance(error, dict):
+            error = error.get('message', json.dumps(error))
+        return record['custom_id'], {'error': str(error)}
+    content = response['body']['choices'][0]['message'].get('content') or ''
+    return record['custom_id'], {'text': content}
+
+class OpenAIBatchBackend:
+    """Runs a job through the OpenAI Batch API"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def submit(self, requests_path):
+        with open(requests_path, 'rb') as f:
+            batch_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=COMPLETION_WINDOW
+        )
+        return batch.id
+
+    def status(self, batch_id):
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id):
+        batch = self.client.batches.retrieve(batch_id)
+        results = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if line.strip():
+                    custom_id, result = parse_output_line(line)
+                    results[custom_id] = result
+        return results
+
+class LocalBatchBackend:
+    """
+    Stand-in backend that answers a batch locally, for tests and dry runs.
+
+    responder takes a request body (model, messages and parameters) and
+    returns the completion text. The default echoes the last message back.
+    Output is written in the Batch API format, so joining works exactly as
+    with the real API.
+    """
+
+    def __init__(self, directory=None, responder=None):
+        self.directory = directory or tempfile.gettempdir()
+        self.responder = responder or (lambda body: body['messages'][-1]['content'])
+
+    def _output_path(self, batch_id):
+        return os.path.join(self.directory, f"{batch_id}.output.jsonl")
+
+    def submit(self, requests_path):
+        batch_id = f"local-{uuid.uuid4().hex}"
+        with open(requests_path) as source, open(self._output_path(batch_id), 'w') as output:
+            for line in source:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                try:
+                    record = {
+                        'custom_id': request['custom_id'],
+                        'response': {
+                            'status_code': 200,
+                            'body': {'choices': [{'message': {'content': self.responder(request['body'])}}]}
+                        }
+                    }
+                except Exception as e:
+                    record = {'custom_id': request['custom_id'], 'error': {'message': str(e)}}
+                output.write(json.dumps(record) + '\n')
+        return batch_id
+
+    def status(self, batch_id):
+        return 'completed' if os.path.exists(self._output_path(batch_id)) else 'failed'
+
+    def results(self, batch_id):
+        results = {}
+        with open(self._output_path(batch_id)) as f:
+            for line in f:
+                if line.strip():
+                    custom_id, result = parse_output_line(line)
+                    results[custom_id] = result
+        return results
+
+class LLMBatchJob:
+    """Requests of many items, submitted as one batch and joined back per item"""
+
+    def __init__(self, directory, use_cache=True):
+        self.directory = directory
+        self.use_cache = use_cache
+        self.manifest_path = os.path.join(directory, 'manifest.json')
+        self.requests_path = os.path.join(directory, 'requests.jsonl')
+        os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {'batch_id': None, 'status': 'open', 'items': [], 'answers': {}}
+
+    @property
+    def batch_id(self):
+        return self.manifest['batch_id']
+
+    def add(self, kind, retriever_data, context=None, requests=(), error=None):
+        """
+        Add an item and the chat requests (model, messages and parameters)
+        it needs answered. context is kept for joining, error records an item
+        that failed before it got to GPT.
+        """
+        if self.manifest['status'] != 'open':
+            raise RuntimeError("Cannot add to a batch that was already submitted")
+
+        item_index = len(self.manifest['items'])
+        custom_ids = []
+        with open(self.requests_path, 'a') as f:
+            for position, request in enumerate(requests):
+                custom_id = f"{kind}-{item_index}-{position}"
+                custom_ids.append(custom_id)
+                body = dict(request)
+
+                if self.use_cache:
+                    params = {key: value for key, value in body.items() if key not in ('model', 'messages')}
+                    cached = llm_cache.get(cache_key(body['model'], body['messages'], params))
+                    if cached is not None:
+                        self.manifest['answers'][custom_id] = {'text': cached}
+                        continue
+
+                f.write(json.dumps({
+                    'custom_id': custom_id,
+                    'method': 'POST',
+                    'url': BATCH_ENDPOINT,
+                    'body': body
+                }) + '\n')
+
+        self.manifest['items'].append({
+            'kind': kind,
+            'retriever_data': retriever_data,
+            'context': context or {},
+            'custom_ids': custom_ids,
+            'error': error
+        })
+        _write_json(self.manifest_path, self.manifest)
+
+    def _pending_requests(self):
+        if not os.path.exists(self.requests_path):
+            return []
+        with open(self.requests_path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def submit(self, backend):
+        """Submit the collected requests as one batch and return its ID (None if nothing had to be sent)"""
+        if self.manifest['status'] != 'open':
+            return self.batch_id
+
+        if self._pending_requests():
+            self.manifest['batch_id'] = backend.submit(self.requests_path)
+            self.manifest['status'] = 'submitted'
+        else:
+            self.manifest['status'] = 'completed'
+        _write_json(self.manifest_path, self.manifest)
+        return self.batch_id
+
+    def poll(self, backend):
+        """Refresh and return the batch status"""
+        if self.manifest['status'] == 'submitted':
+            status = backend.status(self.batch_id)
+            if status in TERMINAL_STATES:
+                self._collect(backend, status)
+            return status
+        return self.manifest['status']
+
+    def wait(self, backend, poll_interval=DEFAULT_POLL_INTERVAL, timeout=None):
+        """Poll until the batch finishes or timeout seconds pass, and return its status"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            status = self.poll(backend)
+            if status in TERMINAL_STATES:
+                return status
+            if deadline is not None and time.monotonic() >= deadline:
+                return status
+            time.sleep(poll_interval)
+
+    def _collect(self, backend, status):
+        """Download the answers once and add them to the shared LLM cache"""
+        answers = backend.results(self.batch_id)
+        if self.use_cache:
+            for request in self._pending_requests():
+                answer = answers.get(request['custom_id'])
+                if answer and 'text' in answer:
+                    body = dict(request['body'])
+                    model, messages = body.pop('model'), body.pop('messages')
+                    llm_cache.put(cache_key(model, messages, body), model, answer['text'])
+
+        self.manifest['answers'].update(answers)
+        self.manifest['status'] = status
+        _write_json(self.manifest_path, self.manifest)
+
+    def items(self, kind, backend=None):
+        """
+        Yield (retriever_data, context, texts, error) for the items of a kind,
+        in the order they were added. texts has one answer per request. error
+        is the item's own error or the first failed request, else None.
+        """
+        if self.manifest['status'] not in TERMINAL_STATES and backend is not None:
+            self.poll(backend)
+        if self.manifest['status'] not in TERMINAL_STATES:
+            raise RuntimeError(f"Batch {self.batch_id} is not finished (status: {self.manifest['status']})")
+
+        answers = self.manifest['answers']
+        for item in self.manifest['items']:
+            if item['kind'] != kind:
+                continue
+            texts = []
+            error = item['error']
+            for custom_id in item['custom_ids']:
+                answer = answers.get(custom_id) or {'error': f"No answer in batch {self.batch_id}"}
+                if 'error' in answer:
+                    error = error or answer['error']
+                    texts.append(None)
+                else:
+                    texts.append(answer['text'])
+            yield item['retriever_data'], item['context'], texts, error
@@ -0,0 +1,170 @@
+"""
+Persistent cache of LLM completions shared by the analyzer tools.
+
+A completion is stored under a hash of everything that determines it: the
+model, the full messages (system prompt and input) and the sampling
+parameters. Re-analyzing the same page or caption with the same prompt is
+then answered from local SQLite instead of the API. Entries expire after a
+TTL, and the least recently used ones are evicted once the stored text
+exceeds the size budget.
+
+    text = chat_completion(client, model="gpt-4o-mini", messages=[...], temperature=0.3)
+"""
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import tempfile
+import threading
+
+try:
+    from .lazy_resources import lazy_resource
+except ImportError:
+    from lazy_resources import lazy_resource
+
+DEFAULT_LLM_CACHE_DB = os.getenv(
+    "LLM_CACHE_DB",
+    os.path.join(tempfile.gettempdir(), "llm_response_cache.sqlite3")
+)
+DEFAULT_LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 30 * 24 * 60 * 60))
+DEFAULT_LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+# A hit only rewrites last_used_at when it is older than this, so hits are
+# plain reads and LRU order is kept to within this many seconds
+TOUCH_INTERVAL = 60
+
+def cache_key(model, messages, params):
+    """sha256 over the model, messages and parameters of a request"""
+    payload = json.dumps(
+        {'model': model, 'messages': messages, 'params': params},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class LLMCache:
+    """SQLite-backed completion cache with TTL, LRU eviction and hit/miss counters"""
+
+    def __init__(self, path=DEFAULT_LLM_CACHE_DB, ttl=DEFAULT_LLM_CACHE_TTL, max_bytes=DEFAULT_LLM_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+        self._local = threading.local()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                "key TEXT PRIMARY KEY, "
+                "model TEXT NOT NULL, "
+                "response TEXT NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, "
+                "last_used_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS completions_lru ON completions (last_used_at)")
+
+    def _connect(self):
+        """One connection per thread, kept open so a hit costs a single indexed read"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, hit):
+        with self._counter_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        """Return the cached completion text for a key, or None"""
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT response, last_used_at FROM completions WHERE key = ? AND expires_at > ?",
+            (key, now)
+        ).fetchone()
+        self._count(row is not None)
+        if row is None:
+            return None
+        
+        if now - row[1] > TOUCH_INTERVAL:
+            with conn:
+                conn.execute("UPDATE completions SET last_used_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def put(self, key, model, response):
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO completions (key, model, response, size, expires_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now + self.ttl, now)
+            )
+        self._evict(conn)
+
+    def _evict(self, conn):
+        """Drop expired entries, then least recently used ones until the cache fits in max_bytes"""
+        with conn:
+            conn.execute("DELETE FROM completions WHERE expires_at <= ?", (time.time(),))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for key, size in conn.execute(
+                "SELECT key, size FROM completions ORDER BY last_used_at"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                total -= size
+
+    def complete(self, client, model, messages, **params):
+        """
+        Return the text of a chat completion, from the cache when possible.
+
+        On a miss the request is sent with client.chat.completions.create and
+        its text is stored. Failed requests are not cached.
+        """
+        key = cache_key(model, messages, params)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        response = client.chat.completions.create(model=model, messages=messages, **params)
+        text = response.choices[0].message.content or ''
+        self.put(key, model, text)
+        return text
+
+    def stats(self):
+        """Entry count, stored size and this process's hits, misses and hit rate"""
+        entries, size = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+        ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'bytes': size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+# Shared by every analyzer in the process
+llm_cache = lazy_resource("llm_cache", LLMCache)
+
+def chat_completion(client, model, messages, use_cache=True, **params):
+    """Text of a chat completion, through the shared cache unless use_cache is False"""
+    if use_cache:
+        return llm_cache.complete(client, model, messages, **params)
+    response = client.chat.completions.create(model=model, messages=messages, **params)
+    return response.choices[0].message.content or ''
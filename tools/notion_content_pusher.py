@@ -1,12 +1,257 @@
 from agency_swarm.tools import BaseTool
 from pydantic import Field
 import os
-from notion_client import Client
+import json
+import time
+import sqlite3
+import hashlib
+import asyncio
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from notion_client import Client, AsyncClient, APIResponseError, APIErrorCode
 from dotenv import load_dotenv
 
+try:
+    from .notion_rate_limiter import notion_limiter
+    from .work_leases import LeaseStore, DEFAULT_LEASE_DB, COMPLETED, HANDED_OFF, stop_heartbeat
+    from .lazy_resources import lazy_resource, loop_local_resource
+    from .notion_outbox import NotionOutbox, OutboxFlusher, DEFAULT_OUTBOX_DB
+    from .sync_checkpoint import SyncCheckpoint
+except ImportError:
+    from notion_rate_limiter import notion_limiter
+    from work_leases import LeaseStore, DEFAULT_LEASE_DB, COMPLETED, HANDED_OFF, stop_heartbeat
+    from lazy_resources import lazy_resource, loop_local_resource
+    from notion_outbox import NotionOutbox, OutboxFlusher, DEFAULT_OUTBOX_DB
+    from sync_checkpoint import SyncCheckpoint
+
 load_dotenv()
 
-notion = Client(auth=os.getenv("NOTION_API_KEY"))
+# Clients are created on first use and shared with the other Notion tools.
+# The async client is created once per event loop, since its connection
+# pool cannot outlive the loop that opened it.
+notion = lazy_resource("notion", lambda: Client(auth=os.getenv("NOTION_API_KEY")))
+async_notion = loop_local_resource("async_notion", lambda: AsyncClient(auth=os.getenv("NOTION_API_KEY")))
+
+# Default number of pushes in flight on the asyncio code path
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Default size of the thread pool used by push_many
+DEFAULT_MAX_WORKERS = 4
+
+# Notion rejects rich_text content longer than this
+NOTION_TEXT_LIMIT = 2000
+
+# Maximum number of children per blocks.children.append request
+BLOCK_BATCH_SIZE = 100
+
+# SQLite file remembering what was last pushed to each page
+DEFAULT_PUSH_STATE_DB = os.path.join(tempfile.gettempdir(), "notion_push_state.sqlite3")
+
+# Notion database holding the Resource Tags pages
+TAG_DATABASE_ID = os.getenv("NOTION_TAG_DATABASE_ID", "")
+
+# Seconds the tag name -> UUID map is trusted before it is reloaded
+TAG_CACHE_TTL = 24 * 3600
+
+# Minimum seconds between reloads triggered by a new unknown tag name
+TAG_MISS_REFRESH_INTERVAL = 60
+
+# Tag names in the tag database for each content type and platform
+CONTENT_TYPE_TAGS = {
+    'text': ['Text'],
+    'video': ['Video'],
+    'website': ['Website'],
+    'image': ['Image'],
+    'document': ['Document']
+}
+PLATFORM_TAGS = {
+    'youtube': 'YouTube',
+    'instagram': 'Instagram',
+    'tiktok': 'TikTok',
+    'social_media': 'Social Media'
+}
+
+def split_text(text, limit=NOTION_TEXT_LIMIT):
+    """
+    Split text into chunks of at most limit characters.
+
+    Lines are packed together while they fit, and lines that are too long
+    are cut at the last space before the limit.
+    """
+    chunks = []
+    current = ''
+    
+    for line in text.split('\n'):
+        while len(line) > limit:
+            cut = line.rfind(' ', 0, limit)
+            if cut <= 0:
+                cut = limit
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.append(line[:cut])
+            line = line[cut:].lstrip(' ')
+        
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            chunks.append(current)
+            current = line
+        else:
+            current = candidate
+    
+    if current:
+        chunks.append(current)
+    return chunks
+
+def stable_hash(value):
+    """Hash a JSON-serializable value independently of dict ordering"""
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+def block_already_deleted(error):
+    """Tell whether a failed blocks.delete means the block is already gone"""
+    if not isinstance(error, APIResponseError):
+        return False
+    if error.code == APIErrorCode.ObjectNotFound:
+        return True
+    # Deleting an archived block is rejected as an edit of an archived block
+    return error.code == APIErrorCode.ValidationError and 'archived' in str(error).lower()
+
+class PushStateStore:
+    """
+    Remembers, per page, the hash of every property last pushed to Notion,
+    the parent database and the body blocks that were written, so re-pushes
+    only send what changed.
+    """
+
+    def __init__(self, path=DEFAULT_PUSH_STATE_DB):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS push_state (page_id TEXT PRIMARY KEY, state TEXT NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, page_id):
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT state FROM push_state WHERE page_id = ?", (page_id,)).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0]) if row else {}
+
+    def put(self, page_id, state):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO push_state (page_id, state) VALUES (?, ?)",
+                    (page_id, json.dumps(state))
+                )
+        finally:
+            conn.close()
+
+class TagResolver:
+    """
+    Resolves Resource Tags names to page UUIDs of the tag database.
+
+    The tag database is read once with a paginated query. The resulting
+    name -> UUID map is kept in memory for the whole process and in a JSON
+    file for later runs, and is reloaded when it is older than TAG_CACHE_TTL
+    or when a lookup asks for a name it does not know. Names still unknown
+    after such a reload are remembered as misses until the next scheduled
+    reload, so they do not trigger another one on every lookup.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, database_id):
+        self.database_id = database_id
+        self.cache_path = os.path.join(tempfile.gettempdir(), f"notion_tags_{database_id}.json")
+        self._tags = None
+        self._misses = set()
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_database(cls, database_id):
+        """Return the process-wide resolver of a tag database"""
+        with cls._instances_lock:
+            if database_id not in cls._instances:
+                cls._instances[database_id] = cls(database_id)
+            return cls._instances[database_id]
+
+    @staticmethod
+    def _normalize(name):
+        return name.strip().lower()
+
+    def _load_from_disk(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+        
+        if time.time() - cached.get('loaded_at', 0) > TAG_CACHE_TTL:
+            return False
+        self._tags = cached['tags']
+        self._misses = set(cached.get('misses', []))
+        self._loaded_at = cached['loaded_at']
+        return True
+
+    def _refresh(self, misses=()):
+        """
+        Read every page of the tag database and rebuild the map.
+
+        The names in misses that are still not found are remembered, a
+        scheduled reload passes none and so forgets them.
+        """
+        tags = {}
+        query = {'database_id': self.database_id, 'page_size': 100}
+        
+        while True:
+            response = notion_limiter.call(notion.databases.query, **query)
+            
+            for page in response['results']:
+                for prop in page.get('properties', {}).values():
+                    if prop.get('type') == 'title':
+                        name = ''.join(part.get('plain_text', '') for part in prop.get('title', []))
+                        if name:
+                            tags[self._normalize(name)] = page['id']
+                        break
+            
+            if not response.get('has_more') or not response.get('next_cursor'):
+                break
+            query['start_cursor'] = response['next_cursor']
+        
+        self._tags = tags
+        self._misses = {key for key in misses if key not in tags}
+        self._loaded_at = time.time()
+        
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.cache_path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'loaded_at': self._loaded_at, 'tags': tags, 'misses': sorted(self._misses)}, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def resolve(self, names):
+        """Return the UUIDs of the given tag names, skipping unknown names"""
+        with self._lock:
+            expired = time.time() - self._loaded_at > TAG_CACHE_TTL
+            if self._tags is None or expired:
+                if not self._load_from_disk():
+                    self._refresh()
+            
+            keys = [self._normalize(name) for name in names]
+            missing = [key for key in keys if key not in self._tags and key not in self._misses]
+            if missing and time.time() - self._loaded_at > TAG_MISS_REFRESH_INTERVAL:
+                # A tag may have been added since the map was loaded
+                self._refresh(self._misses.union(missing))
+            
+            return [self._tags[key] for key in keys if key in self._tags]
 
 class NotionContentPusher(BaseTool):
     """
@@ -20,6 +265,26 @@ class NotionContentPusher(BaseTool):
         default="1468d3c0230680309104f004b3aa2b06",
         description="The ID of the output Notion database"
     )
+    lease_db: str = Field(
+        default=DEFAULT_LEASE_DB,
+        description="SQLite file shared by all workers to claim items"
+    )
+    tag_database_id: str = Field(
+        default=TAG_DATABASE_ID,
+        description="The ID of the Notion database holding the Resource Tags"
+    )
+    push_state_db: str = Field(
+        default=DEFAULT_PUSH_STATE_DB,
+        description="SQLite file remembering what was last pushed to each page"
+    )
+    deferred: bool = Field(
+        default=False,
+        description="Queue the item in the local outbox and return immediately instead of pushing now"
+    )
+    outbox_db: str = Field(
+        default=DEFAULT_OUTBOX_DB,
+        description="SQLite file of the durable outbox used in deferred mode"
+    )
 
     def run(self):
         """
@@ -31,28 +296,400 @@ class NotionContentPusher(BaseTool):
             if not page_id:
                 return {"error": "No page_id provided in content_data"}
 
-            # First, move the page to the output database
-            moved_page = notion.pages.update(
-                page_id=page_id,
-                parent={"database_id": self.database_id}
-            )
+            # Hand the item to the outbox flusher, analysis can move on
+            if self.deferred:
+                return self._enqueue(page_id)
+
+            # Make sure no other worker took over this page
+            conflict = self._hold_lease(page_id)
+            if conflict:
+                return conflict
+
+            # Only send what changed since the last push of this page
+            plan = self._plan_push(page_id, self._format_properties())
             
-            # Then update the page with processed content
-            properties = self._format_properties()
-            updated_page = notion.pages.update(
-                page_id=page_id,
-                properties=properties
-            )
+            if plan['update']:
+                # Move the page to the output database and update its
+                # properties in a single request
+                notion_limiter.call(notion.pages.update, page_id=page_id, **plan['update'])
             
-            return {
-                "status": "success",
-                "message": "Page moved and updated successfully",
-                "page_id": updated_page['id']
-            }
+            # Write content too long for a property into the page body
+            if plan['body_changed']:
+                self._replace_body(page_id, plan)
+            
+            PushStateStore(self.push_state_db).put(page_id, plan['state'])
+            
+            self._commit_checkpoint(page_id)
+            self._settle_lease(page_id, succeeded=True)
+            return self._push_result(page_id, plan)
+
+        except Exception as e:
+            self._settle_lease(self.content_data.get('page_id'), succeeded=False)
+            return f"Error updating Notion: {str(e)}"
+
+    async def arun(self):
+        """Asyncio counterpart of run() built on AsyncClient"""
+        try:
+            page_id = self.content_data.get('page_id')
+            if not page_id:
+                return {"error": "No page_id provided in content_data"}
+
+            if self.deferred:
+                return self._enqueue(page_id)
+
+            conflict = self._hold_lease(page_id)
+            if conflict:
+                return conflict
+
+            # Formatting may load the tag database on first use, keep it
+            # off the event loop
+            properties = await asyncio.to_thread(self._format_properties)
+            plan = self._plan_push(page_id, properties)
+            
+            if plan['update']:
+                await notion_limiter.acall(async_notion.pages.update, page_id=page_id, **plan['update'])
+            
+            if plan['body_changed']:
+                await self._areplace_body(page_id, plan)
+            
+            PushStateStore(self.push_state_db).put(page_id, plan['state'])
+            
+            self._commit_checkpoint(page_id)
+            self._settle_lease(page_id, succeeded=True)
+            return self._push_result(page_id, plan)
 
         except Exception as e:
+            self._settle_lease(self.content_data.get('page_id'), succeeded=False)
             return f"Error updating Notion: {str(e)}"
 
+    @classmethod
+    def start_outbox_flusher(cls, outbox_db=DEFAULT_OUTBOX_DB, database_id=None, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Start a background thread that drains the outbox into Notion.
+
+        Entries are pushed with the options they were queued with,
+        database_id only applies to entries queued without one. The lease of
+        an entry that runs out of attempts is released so another worker can
+        process the item again. Returns the running OutboxFlusher, call
+        stop() on it to shut it down.
+        """
+        flusher = OutboxFlusher(
+            NotionOutbox(outbox_db),
+            lambda items, options: cls.push_many(
+                items, database_id=database_id, max_workers=max_workers, options=options
+            ),
+            on_dead=cls._release_handoff
+        )
+        flusher.start()
+        return flusher
+
+    @classmethod
+    def push_many(cls, items, database_id=None, max_workers=DEFAULT_MAX_WORKERS, options=None):
+        """
+        Push a batch of processed items through a bounded thread pool.
+
+        options is an optional list with one dict of pusher fields per item
+        (as saved in the outbox), applied on top of database_id. Returns one
+        report per item, in the same order, with a 'status' of 'success' or
+        'error' and the page_id it refers to.
+        """
+        if not items:
+            return []
+        
+        defaults = {"database_id": database_id} if database_id else {}
+        per_item = options or [{}] * len(items)
+        
+        def push(item, item_options):
+            try:
+                result = cls(content_data=item, **{**defaults, **(item_options or {})}).run()
+            except Exception as e:
+                result = f"Error updating Notion: {str(e)}"
+            
+            if isinstance(result, dict) and result.get('status') == 'success':
+                return {"status": "success", "page_id": item.get('page_id')}
+            error = result.get('error') if isinstance(result, dict) else result
+            return {"status": "error", "page_id": item.get('page_id'), "error": error}
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+            return list(executor.map(push, items, per_item))
+
+    @classmethod
+    async def apush_many(cls, items, database_id=None, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        """
+        Push many processed items concurrently from the event loop.
+
+        At most max_concurrency pushes are in flight at once. Results are
+        returned in the same order as items.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        options = {"database_id": database_id} if database_id else {}
+        
+        async def push(item):
+            async with semaphore:
+                return await cls(content_data=item, **options).arun()
+        
+        return await asyncio.gather(*(push(item) for item in items))
+
+    def _enqueue(self, page_id):
+        """
+        Durably queue the item, with this pusher's options, for the outbox flusher.
+
+        The retriever's lease is handed off to the outbox first, so neither
+        this worker nor another one picks the item up again while its push
+        waits or is retried.
+        """
+        worker_id = self.content_data.get('worker_id')
+        if worker_id:
+            stop_heartbeat(self.lease_db, page_id, worker_id)
+            if not LeaseStore(self.lease_db).hand_off(page_id, worker_id):
+                return {"error": f"Page {page_id} is claimed by another worker"}
+        
+        entry_id = NotionOutbox(self.outbox_db).enqueue(self.content_data, {
+            "database_id": self.database_id,
+            "tag_database_id": self.tag_database_id,
+            "push_state_db": self.push_state_db,
+            "lease_db": self.lease_db
+        })
+        return {
+            "status": "queued",
+            "message": "Page queued for pushing to Notion",
+            "page_id": page_id,
+            "outbox_id": entry_id
+        }
+
+    def _commit_checkpoint(self, page_id):
+        """Tell the retriever's incremental sync checkpoint that the item was pushed"""
+        checkpoint_path = self.content_data.get('checkpoint_path')
+        last_edited_time = self.content_data.get('last_edited_time')
+        if checkpoint_path and last_edited_time:
+            SyncCheckpoint(checkpoint_path).advance(
+                self.content_data.get('source_database_id'), last_edited_time, page_id
+            )
+
+    def _hold_lease(self, page_id):
+        """
+        Re-assert the retriever's lease on the page before touching it.
+
+        The outbox push of a handed-off item, and a re-push of an item this
+        claim already completed, hold it too.
+        """
+        worker_id = self.content_data.get('worker_id')
+        if not worker_id:
+            return None
+        
+        leases = LeaseStore(self.lease_db)
+        if not leases.claim(page_id, worker_id) and leases.held_state(page_id, worker_id) not in (COMPLETED, HANDED_OFF):
+            return {"error": f"Page {page_id} is claimed by another worker"}
+        return None
+
+    def _settle_lease(self, page_id, succeeded):
+        """Mark a claimed page as done, or release it for a retry after a failure"""
+        worker_id = self.content_data.get('worker_id')
+        if not worker_id or not page_id:
+            return
+        
+        # The lease was renewed since the retriever claimed it
+        stop_heartbeat(self.lease_db, page_id, worker_id)
+        leases = LeaseStore(self.lease_db)
+        if succeeded:
+            leases.complete(page_id, worker_id)
+        else:
+            # A handed-off lease stays held while the outbox retries
+            leases.release(page_id, worker_id)
+
+    @staticmethod
+    def _release_handoff(content_data, options):
+        """Free the item of an outbox entry that will not be pushed"""
+        worker_id = content_data.get('worker_id')
+        if worker_id:
+            LeaseStore(options.get('lease_db') or DEFAULT_LEASE_DB).release(
+                content_data['page_id'], worker_id, handed_off=True
+            )
+        if content_data.get('checkpoint_path'):
+            SyncCheckpoint(content_data['checkpoint_path']).release(
+                content_data.get('source_database_id'), content_data['page_id']
+            )
+
+    def _main_content(self):
+        """Return the main content of the item as a string, or None"""
+        processed_content = self.content_data.get('processed_content', {})
+        content_field_mapping = {
+            'text': 'generated_questions',
+            'video': 'transcript',
+            'website': 'content',
+            'image': 'description',
+            'document': 'summary'
+        }
+        
+        content_field = content_field_mapping.get(self.content_data.get('type', 'unknown'))
+        if not content_field or content_field not in processed_content:
+            return None
+        
+        content_value = processed_content[content_field]
+        if isinstance(content_value, list):
+            content_value = "\n• " + "\n• ".join(content_value)
+        return str(content_value)
+
+    def _content_blocks(self):
+        """
+        Build paragraph blocks holding the full main content.
+
+        Only content that does not fit in a rich_text property is written to
+        the page body. Returns an empty list otherwise.
+        """
+        content_value = self._main_content()
+        if content_value is None or len(content_value) <= NOTION_TEXT_LIMIT:
+            return []
+        
+        return [
+            {
+                "object": "block",
+                "type": "paragraph",
+                "paragraph": {
+                    "rich_text": [{"type": "text", "text": {"content": chunk}}]
+                }
+            }
+            for chunk in split_text(content_value)
+        ]
+
+    def _body_progress(self, page_id, plan):
+        """
+        State recorded while the page body is being rewritten.
+
+        It lists the blocks on the page at that point and has no body hash,
+        so a push that fails half way is retried from what is actually there.
+        """
+        store = PushStateStore(self.push_state_db)
+        progress = {**plan['state'], 'body': None, 'blocks': list(plan['stale_blocks'])}
+        
+        def deleted(block_id):
+            progress['blocks'].remove(block_id)
+            store.put(page_id, progress)
+        
+        def appended(block_ids):
+            progress['blocks'].extend(block_ids)
+            store.put(page_id, progress)
+        
+        return deleted, appended
+
+    def _replace_body(self, page_id, plan):
+        """
+        Delete the blocks of the last push and append the new ones, saving
+        progress after every request. Blocks that are already archived count
+        as deleted.
+        """
+        deleted, appended = self._body_progress(page_id, plan)
+        for block_id in plan['stale_blocks']:
+            try:
+                notion_limiter.call(notion.blocks.delete, block_id=block_id)
+            except APIResponseError as e:
+                if not block_already_deleted(e):
+                    raise
+            deleted(block_id)
+        plan['state']['blocks'] = self._append_content_blocks(page_id, plan['blocks'], appended)
+
+    async def _areplace_body(self, page_id, plan):
+        """Asyncio counterpart of _replace_body()"""
+        deleted, appended = self._body_progress(page_id, plan)
+        for block_id in plan['stale_blocks']:
+            try:
+                await notion_limiter.acall(async_notion.blocks.delete, block_id=block_id)
+            except APIResponseError as e:
+                if not block_already_deleted(e):
+                    raise
+            deleted(block_id)
+        plan['state']['blocks'] = await self._aappend_content_blocks(page_id, plan['blocks'], appended)
+
+    def _append_content_blocks(self, page_id, blocks, on_batch=None):
+        """
+        Append blocks to the page body, up to 100 blocks per request.
+
+        on_batch is called with the IDs created by each request. Returns the
+        IDs of all created blocks.
+        """
+        block_ids = []
+        for start in range(0, len(blocks), BLOCK_BATCH_SIZE):
+            response = notion_limiter.call(
+                notion.blocks.children.append,
+                idempotent=False,
+                block_id=page_id,
+                children=blocks[start:start + BLOCK_BATCH_SIZE]
+            )
+            batch_ids = [block['id'] for block in response.get('results', [])]
+            block_ids.extend(batch_ids)
+            if on_batch:
+                on_batch(batch_ids)
+        return block_ids
+
+    async def _aappend_content_blocks(self, page_id, blocks, on_batch=None):
+        """Asyncio counterpart of _append_content_blocks()"""
+        block_ids = []
+        for start in range(0, len(blocks), BLOCK_BATCH_SIZE):
+            response = await notion_limiter.acall(
+                async_notion.blocks.children.append,
+                idempotent=False,
+                block_id=page_id,
+                children=blocks[start:start + BLOCK_BATCH_SIZE]
+            )
+            batch_ids = [block['id'] for block in response.get('results', [])]
+            block_ids.extend(batch_ids)
+            if on_batch:
+                on_batch(batch_ids)
+        return block_ids
+
+    def _plan_push(self, page_id, properties):
+        """
+        Compare the formatted item with what was last pushed to the page.
+
+        Returns the pages.update arguments for the changed properties (None
+        when nothing changed), whether the page body must be rewritten, and
+        the state to record once the push succeeds.
+        """
+        previous = PushStateStore(self.push_state_db).get(page_id)
+        previous_hashes = previous.get('properties', {})
+        
+        hashes = {name: stable_hash(value) for name, value in properties.items()}
+        changed = {
+            name: value for name, value in properties.items()
+            if previous_hashes.get(name) != hashes[name]
+        }
+        
+        update = {}
+        if previous.get('parent') != self.database_id:
+            update['parent'] = {"database_id": self.database_id}
+        if changed:
+            update['properties'] = changed
+        
+        blocks = self._content_blocks()
+        body_hash = stable_hash(blocks)
+        body_changed = previous.get('body', stable_hash([])) != body_hash
+        
+        return {
+            'update': update or None,
+            'body_changed': body_changed,
+            'blocks': blocks,
+            'stale_blocks': previous.get('blocks', []) if body_changed else [],
+            'state': {
+                'parent': self.database_id,
+                # Keep hashes of properties that were not sent this time
+                'properties': {**previous_hashes, **hashes},
+                'body': body_hash,
+                'blocks': previous.get('blocks', [])
+            }
+        }
+
+    def _push_result(self, page_id, plan):
+        """Describe what a push actually sent to Notion"""
+        if not plan['update'] and not plan['body_changed']:
+            message = "No changes since the last push, update skipped"
+        else:
+            message = "Page moved and updated successfully"
+        return {
+            "status": "success",
+            "message": message,
+            "page_id": page_id
+        }
+
     def _format_properties(self):
         """Format the content data according to Notion's API requirements"""
         processed_content = self.content_data.get('processed_content', {})
@@ -80,21 +717,14 @@ class NotionContentPusher(BaseTool):
                 }
 
         # Summary/Key Points/Description/Transcript (rich_text)
-        content_field_mapping = {
-            'text': 'generated_questions',
-            'video': 'transcript',
-            'website': 'content',
-            'image': 'description',
-            'document': 'summary'
-        }
-        
-        content_field = content_field_mapping.get(content_type)
-        if content_field and content_field in processed_content:
-            content_value = processed_content[content_field]
-            if isinstance(content_value, list):
-                content_value = "\n• " + "\n• ".join(content_value)
+        # Long content only keeps a truncated summary here, the full text
+        # goes into the page body (see _content_blocks)
+        content_value = self._main_content()
+        if content_value is not None:
+            if len(content_value) > NOTION_TEXT_LIMIT:
+                content_value = content_value[:NOTION_TEXT_LIMIT - 1] + "…"
             properties["Summary/Key Points/Description/Transcript"] = {
-                "rich_text": [{"text": {"content": str(content_value)}}]
+                "rich_text": [{"text": {"content": content_value}}]
             }
 
         # Channel/Account/Author (rich_text)
@@ -139,7 +769,7 @@ class NotionContentPusher(BaseTool):
                 "rich_text": [{"text": {"content": processed_content['dimensions']}}]
             }
 
-        # Resource Tags (relation) - needs configuration with actual database IDs
+        # Resource Tags (relation), resolved from the cached tag database
         tags = self._get_resource_tags(content_type)
         if tags:
             properties["Resource Tags"] = {
@@ -149,48 +779,41 @@ class NotionContentPusher(BaseTool):
         return properties
 
     def _get_resource_tags(self, content_type):
-        """Get appropriate resource tags based on content type"""
-        # This needs to be configured with actual tag IDs from your Notion database
-        tag_mapping = {
-            'text': ['text_content_tag_id'],
-            'video': ['video_content_tag_id'],
-            'website': ['web_content_tag_id'],
-            'image': ['image_content_tag_id'],
-            'document': ['document_tag_id']
-        }
+        """Get the UUIDs of the resource tags matching the content type and platform"""
+        if not self.tag_database_id:
+            return []
         
-        # Add platform-specific tags
-        platform_tags = {
-            'youtube': 'youtube_tag_id',
-            'instagram': 'instagram_tag_id',
-            'social_media': 'social_media_tag_id'
-        }
+        # Copy so the module-level mapping is never mutated
+        names = list(CONTENT_TYPE_TAGS.get(content_type, []))
         
-        tags = tag_mapping.get(content_type, [])
+        # Add platform-specific tags
         platform = self.content_data.get('platform')
-        if platform in platform_tags:
-            tags.append(platform_tags[platform])
-            
-        return tags
+        if platform in PLATFORM_TAGS:
+            names.append(PLATFORM_TAGS[platform])
+        
+        if not names:
+            return []
+        return TagResolver.for_database(self.tag_database_id).resolve(names)
 
     def tag_video_content(self, page_id):
         """Tag video content with appropriate UUID"""
         try:
-            # Get all available tag UUIDs
-            tag_uuids = self.get_tag_uuids()
+            if not self.tag_database_id:
+                raise Exception("No tag database configured")
             
             # Get video tag UUID
-            video_tag_id = tag_uuids.get('video')
-            if not video_tag_id:
+            video_tag_ids = TagResolver.for_database(self.tag_database_id).resolve(CONTENT_TYPE_TAGS['video'])
+            if not video_tag_ids:
                 raise Exception("Video tag UUID not found")
             
             # Update the page with correct UUID
-            notion.pages.update(
+            notion_limiter.call(
+                notion.pages.update,
                 page_id=page_id,
                 properties={
                     "Resource Tags": {
                         "relation": [
-                            {"id": video_tag_id}
+                            {"id": tag_id} for tag_id in video_tag_ids
                         ]
                     }
                 }
@@ -217,4 +840,19 @@ if __name__ == "__main__":
         content_data=test_data,
         database_id="1468d3c0230680309104f004b3aa2b06"
     )
-    print(tool.run()) 
\ No newline at end of file
+    print(tool.run())
+    
+    # Deferred mode: queue the item and let a background flusher push it
+    deferred_tool = NotionContentPusher(content_data=test_data, deferred=True)
+    print(deferred_tool.run())
+    flusher = NotionContentPusher.start_outbox_flusher()
+    flusher.stop(timeout=30)
+    
+    # Bulk mode with a report per item
+    print(NotionContentPusher.push_many([test_data]))
+    
+    # Asyncio code path
+    print(asyncio.run(NotionContentPusher.apush_many([test_data])))
+    
+    # Time spent waiting on the shared Notion rate limit
+    print(notion_limiter.metrics()) 
\ No newline at end of file
@@ -1,17 +1,376 @@
 from agency_swarm.tools import BaseTool
 from pydantic import Field
 import os
+import asyncio
 import requests
-from notion_client import Client
+from notion_client import Client, AsyncClient
 from dotenv import load_dotenv
-import re
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import threading
 import mimetypes
 import tempfile
-from urllib.parse import urlparse
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, urlencode, parse_qsl
+
+try:
+    from .url_classifier import classify_link
+    from .notion_rate_limiter import notion_limiter
+    from .work_leases import (
+        LeaseStore, DEFAULT_LEASE_DB, DEFAULT_LEASE_TTL, default_worker_id, claim_token, start_heartbeat, stop_heartbeat
+    )
+    from .lazy_resources import lazy_resource, loop_local_resource
+    from .sync_checkpoint import SyncCheckpoint, DEFAULT_CHECKPOINT_PATH
+except ImportError:
+    from url_classifier import classify_link
+    from notion_rate_limiter import notion_limiter
+    from work_leases import (
+        LeaseStore, DEFAULT_LEASE_DB, DEFAULT_LEASE_TTL, default_worker_id, claim_token, start_heartbeat, stop_heartbeat
+    )
+    from lazy_resources import lazy_resource, loop_local_resource
+    from sync_checkpoint import SyncCheckpoint, DEFAULT_CHECKPOINT_PATH
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, downloads are then only serialized per process
+    fcntl = None
 
 load_dotenv()
 
-notion = Client(auth=os.getenv("NOTION_API_KEY"))
+# Clients are created on first use and shared with the other Notion tools.
+# The async client is created once per event loop, since its connection
+# pool cannot outlive the loop that opened it.
+notion = lazy_resource("notion", lambda: Client(auth=os.getenv("NOTION_API_KEY")))
+async_notion = loop_local_resource("async_notion", lambda: AsyncClient(auth=os.getenv("NOTION_API_KEY")))
+
+# Maximum page size allowed by the Notion API
+BATCH_PAGE_SIZE = 100
+
+# Page size used by run() to find an item no other worker has claimed
+CLAIM_PAGE_SIZE = 10
+
+DOCUMENT_EXTENSIONS = {
+    '.pdf', '.doc', '.docx', '.txt', '.md', '.rtf', '.odt',
+    '.ppt', '.pptx', '.xls', '.xlsx', '.csv'
+}
+
+# Downloads are streamed to disk in chunks of this size
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# (connect, read) timeouts in seconds for file downloads
+DOWNLOAD_TIMEOUT = (10, 60)
+
+# Default size budget of the content-addressed download cache
+DOWNLOAD_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+# Seconds a cached download is served before the server is asked again
+# whether the file changed
+DOWNLOAD_REVALIDATE_INTERVAL = 300
+
+# Seconds a file handed out by the download cache is kept from eviction
+# unless it is released earlier, so a crashed run does not pin it forever
+DOWNLOAD_PIN_TTL = 6 * 60 * 60
+
+# [lock, users] per .part file being downloaded in this process. Entries
+# are dropped as soon as nobody waits for them.
+_part_locks = {}
+_part_locks_guard = threading.Lock()
+
+@contextmanager
+def _part_lock(part_path):
+    """
+    Hold the lock of a .part file, so concurrent downloads of a URL take
+    turns and the later ones are served from the cache.
+
+    Threads wait on an in-process lock, and processes on an flock of the
+    .part.lock file next to it, which the OS releases if a process dies.
+    """
+    with _part_locks_guard:
+        entry = _part_locks.setdefault(part_path, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            # The lock file is left in place, removing it would let two
+            # processes hold locks on different files
+            with open(part_path + '.lock', 'a') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                yield
+    finally:
+        with _part_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _part_locks[part_path]
+
+class DownloadCache:
+    """
+    Content-addressed store for downloaded files.
+
+    Objects live under <root>/objects/<sha256><ext> and are indexed by hash
+    and extension, and an SQLite index maps each normalized URL to the
+    object it produced, together with the ETag and size of the response.
+    Files handed out to callers are hardlinks (or symlinks, or copies as a
+    last resort) to those objects, so duplicate attachments share one copy
+    on disk. Least recently used objects are evicted once the cache grows
+    beyond max_bytes, except those handed out within DOWNLOAD_PIN_TTL that
+    were not released yet.
+
+    A hit that was not checked for DOWNLOAD_REVALIDATE_INTERVAL seconds is
+    revalidated with a conditional request (If-None-Match, or a one-byte
+    Range request compared on size when there is no ETag), so a changed
+    attachment is downloaded again.
+    """
+
+    # Query parameters of pre-signed S3 URLs that change on every Notion request
+    SIGNING_PARAMS = ('x-amz-', 'expires', 'signature', 'awsaccesskeyid')
+
+    def __init__(self, root, max_bytes=DOWNLOAD_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.objects_dir = os.path.join(root, 'objects')
+        self.path = os.path.join(root, 'index.sqlite3')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS urls ("
+                    "url TEXT PRIMARY KEY, hash TEXT NOT NULL, ext TEXT NOT NULL, "
+                    "etag TEXT, size INTEGER NOT NULL, checked_at REAL NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS objects ("
+                    "hash TEXT NOT NULL, ext TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL, "
+                    "PRIMARY KEY (hash, ext))"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS links ("
+                    "path TEXT PRIMARY KEY, hash TEXT NOT NULL, ext TEXT NOT NULL, pinned_until REAL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS objects_lru ON objects (last_used)")
+                conn.execute("CREATE INDEX IF NOT EXISTS links_object ON links (hash, ext)")
+                self._import_json_index(conn)
+        finally:
+            conn.close()
+
+    def _import_json_index(self, conn):
+        """Take over the entries of the index.json written by earlier versions"""
+        index_path = os.path.join(self.root, 'index.json')
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        
+        for content_hash, obj in index.get('objects', {}).items():
+            conn.execute(
+                "INSERT OR IGNORE INTO objects (hash, ext, size, last_used) VALUES (?, ?, ?, ?)",
+                (content_hash, obj['ext'], obj['size'], obj.get('last_used', 0))
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO links (path, hash, ext) VALUES (?, ?, ?)",
+                [(path, content_hash, obj['ext']) for path in obj.get('links', [])]
+            )
+        for url, entry in index.get('urls', {}).items():
+            size = index.get('objects', {}).get(entry['hash'], {}).get('size', 0)
+            validator = entry.get('validator')
+            conn.execute(
+                "INSERT OR IGNORE INTO urls (url, hash, ext, etag, size, checked_at) VALUES (?, ?, ?, ?, ?, 0)",
+                (url, entry['hash'], entry['ext'], validator if validator != str(size) else None, size)
+            )
+        try:
+            os.remove(index_path)
+        except FileNotFoundError:
+            # Another process imported it at the same time
+            pass
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @classmethod
+    def normalize_url(cls, url):
+        """Strip the expiring signature from a URL so it identifies the file"""
+        parsed = urlparse(url)
+        query = [
+            (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+            if not key.lower().startswith(cls.SIGNING_PARAMS)
+        ]
+        return parsed._replace(query=urlencode(sorted(query)), fragment='').geturl()
+
+    def lookup(self, url):
+        """Return the cached object path for a URL, or None on a miss or when the file changed"""
+        key = self.normalize_url(url)
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT u.hash, u.ext, u.etag, u.size, u.checked_at FROM urls u "
+                "JOIN objects o ON o.hash = u.hash AND o.ext = u.ext WHERE u.url = ?",
+                (key,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if not row:
+            return None
+        
+        content_hash, ext, etag, size, checked_at = row
+        object_path = os.path.join(self.objects_dir, content_hash + ext)
+        if not os.path.exists(object_path):
+            return None
+        
+        now = time.time()
+        revalidate = now - checked_at >= DOWNLOAD_REVALIDATE_INTERVAL
+        if revalidate and not self._is_current(url, etag, size):
+            return None
+        
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "UPDATE objects SET last_used = ? WHERE hash = ? AND ext = ?", (now, content_hash, ext)
+                )
+                if revalidate:
+                    conn.execute("UPDATE urls SET checked_at = ? WHERE url = ?", (now, key))
+        finally:
+            conn.close()
+        return object_path
+
+    @staticmethod
+    def _is_current(url, etag, size):
+        """Ask the server whether the file behind a URL still has this ETag or size"""
+        headers = {'If-None-Match': etag} if etag else {'Range': 'bytes=0-0'}
+        try:
+            with requests.get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+                if response.status_code == 304:
+                    return True
+                if response.status_code >= 400:
+                    # The server cannot tell, keep serving the cached copy
+                    return True
+                if etag:
+                    return response.headers.get('etag') == etag
+                if response.status_code == 206:
+                    return response.headers.get('content-range', '').rsplit('/', 1)[-1] == str(size)
+                return response.headers.get('content-length') == str(size)
+        except requests.RequestException:
+            return True
+
+    def store(self, url, file_path, ext, etag=None):
+        """Move a downloaded file into the cache and return its object path"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()
+        ext = ext.lower()
+        size = os.path.getsize(file_path)
+        object_path = os.path.join(self.objects_dir, content_hash + ext)
+        
+        if os.path.exists(object_path):
+            # Same content already cached under another URL
+            os.remove(file_path)
+        else:
+            os.replace(file_path, object_path)
+        
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO urls (url, hash, ext, etag, size, checked_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.normalize_url(url), content_hash, ext, etag, size, now)
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO objects (hash, ext, size, last_used) VALUES (?, ?, ?, ?)",
+                    (content_hash, ext, size, now)
+                )
+                self._evict(conn, keep=(content_hash, ext))
+        finally:
+            conn.close()
+        
+        return object_path
+
+    def link(self, object_path, dest_path):
+        """
+        Expose a cached object at dest_path without copying it if possible.
+
+        The object is pinned against eviction until release(dest_path) or
+        DOWNLOAD_PIN_TTL, whichever comes first.
+        """
+        if os.path.lexists(dest_path):
+            if os.path.exists(dest_path) and os.path.samefile(object_path, dest_path):
+                return dest_path
+            os.remove(dest_path)
+        
+        try:
+            os.link(object_path, dest_path)
+        except OSError:
+            try:
+                os.symlink(os.path.abspath(object_path), dest_path)
+            except OSError:
+                shutil.copy2(object_path, dest_path)
+        
+        content_hash, ext = os.path.splitext(os.path.basename(object_path))
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO links (path, hash, ext, pinned_until) VALUES (?, ?, ?, ?)",
+                    (dest_path, content_hash, ext, time.time() + DOWNLOAD_PIN_TTL)
+                )
+        finally:
+            conn.close()
+        
+        return dest_path
+
+    def release(self, dest_path):
+        """Let the object behind a file handed out by link() be evicted again"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("UPDATE links SET pinned_until = NULL WHERE path = ?", (dest_path,))
+        finally:
+            conn.close()
+
+    def _evict(self, conn, keep=None):
+        """Drop least recently used objects until the cache fits in max_bytes"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        # Pinned objects are skipped, even if the cache stays over budget
+        keep_hash, keep_ext = keep or ('', '')
+        candidates = conn.execute(
+            "SELECT o.hash, o.ext, o.size FROM objects o "
+            "WHERE NOT (o.hash = ? AND o.ext = ?) "
+            "AND NOT EXISTS (SELECT 1 FROM links l "
+            "                WHERE l.hash = o.hash AND l.ext = o.ext AND l.pinned_until > ?) "
+            "ORDER BY o.last_used",
+            (keep_hash, keep_ext, time.time())
+        ).fetchall()
+        for content_hash, ext, size in candidates:
+            if total <= self.max_bytes:
+                break
+            total -= size
+            
+            links = [
+                path for (path,) in conn.execute(
+                    "SELECT path FROM links WHERE hash = ? AND ext = ?", (content_hash, ext)
+                )
+            ]
+            for path in links + [os.path.join(self.objects_dir, content_hash + ext)]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            for table in ('objects', 'urls', 'links'):
+                conn.execute(f"DELETE FROM {table} WHERE hash = ? AND ext = ?", (content_hash, ext))
 
 class NotionDatabaseRetriever(BaseTool):
     """
@@ -25,6 +384,38 @@ class NotionDatabaseRetriever(BaseTool):
         default=tempfile.gettempdir(),
         description="Directory to download files to"
     )
+    max_download_workers: int = Field(
+        default=4,
+        description="Maximum number of files downloaded at the same time"
+    )
+    max_concurrency: int = Field(
+        default=8,
+        description="Maximum number of requests in flight on the asyncio code path"
+    )
+    cache_max_bytes: int = Field(
+        default=DOWNLOAD_CACHE_MAX_BYTES,
+        description="Size budget of the download cache before old files are evicted"
+    )
+    incremental: bool = Field(
+        default=False,
+        description="Only retrieve items edited after the last committed checkpoint"
+    )
+    checkpoint_path: str = Field(
+        default=DEFAULT_CHECKPOINT_PATH,
+        description="SQLite file that stores the incremental sync checkpoint"
+    )
+    worker_id: str = Field(
+        default_factory=default_worker_id,
+        description="Identifier of this worker when claiming items"
+    )
+    lease_ttl: int = Field(
+        default=DEFAULT_LEASE_TTL,
+        description="Seconds a claimed item stays reserved for this worker"
+    )
+    lease_db: str = Field(
+        default=DEFAULT_LEASE_DB,
+        description="SQLite file shared by all workers to claim items"
+    )
 
     def get_property_safely(self, properties, property_name):
         """Safely extract property value from Notion properties"""
@@ -68,48 +459,238 @@ class NotionDatabaseRetriever(BaseTool):
             return None if property_name == 'File' else ''
 
     def run(self):
-        """Retrieves one item from the database"""
+        """Retrieves and claims one item from the database"""
         try:
-            # Query only one item
-            response = notion.databases.query(
-                database_id=self.database_id,
-                page_size=1
-            )
+            # Skip items that other workers have already claimed
+            item = next(self.iter_items(
+                page_size=CLAIM_PAGE_SIZE,
+                incremental=self.incremental,
+                claim=True
+            ), None)
             
-            if not response['results']:
+            if item is None:
+                if self.incremental:
+                    return {"status": "empty", "message": "No new items since last checkpoint"}
                 return {"status": "empty", "message": "No items to process"}
             
-            page = response['results'][0]
-            page_id = page['id']
-            properties = page.get('properties', {})
-            
-            # Extract properties safely
-            name = self.get_property_safely(properties, 'Name')
-            link = self.get_property_safely(properties, 'Link')
-            file_info = self.get_property_safely(properties, 'File')
-            
-            # Determine content type
-            if file_info:
-                content_type = self._identify_file_type(file_info)
-            elif name.startswith('"') and name.endswith('"'):
-                content_type = {'type': 'text', 'platform': 'text'}
-            elif link:
-                content_type = self._identify_content_type(link, name)
-            else:
-                content_type = {'type': 'unknown', 'platform': 'unknown'}
+            return item
             
-            return {
-                'page_id': page_id,
-                'name': name,
-                'link': link,
-                'file': file_info,
-                'type': content_type['type'],
-                'platform': content_type['platform']
-            }
+        except Exception as e:
+            return f"Error retrieving from database: {str(e)}"
+
+    def iter_items(self, page_size=BATCH_PAGE_SIZE, incremental=False, claim=False):
+        """
+        Yields every item of the database as a classified dict.
+
+        Follows start_cursor/has_more so a worker can drain the whole
+        database in one pass while only one page of results is held in memory.
+        With incremental=True only pages edited since the checkpoint are
+        yielded, oldest first. Each one is recorded as pending in the
+        checkpoint until the pusher (or commit_checkpoint) reports it pushed.
+        With claim=True only items this worker managed to lease are yielded,
+        so several workers can drain one database.
+        """
+        query, done = self._build_query(page_size, incremental)
+        checkpoint = SyncCheckpoint(self.checkpoint_path) if incremental else None
+        leases = LeaseStore(self.lease_db) if claim else None
+        
+        while True:
+            response = notion_limiter.call(notion.databases.query, **query)
+            
+            for page in response['results']:
+                if done.get(page['id']) == page.get('last_edited_time'):
+                    continue
+                token = self._claim(leases, page['id']) if leases is not None else None
+                if leases is not None and token is None:
+                    continue
+                yield self._start_item(page, checkpoint, token)
+            
+            if not response.get('has_more') or not response.get('next_cursor'):
+                break
+            query['start_cursor'] = response['next_cursor']
+
+    async def arun(self):
+        """Asyncio counterpart of run() built on AsyncClient"""
+        try:
+            async for item in self.aiter_items(
+                page_size=CLAIM_PAGE_SIZE,
+                incremental=self.incremental,
+                claim=True
+            ):
+                return item
+            
+            if self.incremental:
+                return {"status": "empty", "message": "No new items since last checkpoint"}
+            return {"status": "empty", "message": "No items to process"}
             
         except Exception as e:
             return f"Error retrieving from database: {str(e)}"
 
+    async def aiter_items(self, page_size=BATCH_PAGE_SIZE, incremental=False, claim=False):
+        """Asyncio counterpart of iter_items() built on AsyncClient"""
+        query, done = self._build_query(page_size, incremental)
+        checkpoint = SyncCheckpoint(self.checkpoint_path) if incremental else None
+        leases = LeaseStore(self.lease_db) if claim else None
+        
+        while True:
+            response = await notion_limiter.acall(async_notion.databases.query, **query)
+            
+            for page in response['results']:
+                if done.get(page['id']) == page.get('last_edited_time'):
+                    continue
+                token = self._claim(leases, page['id']) if leases is not None else None
+                if leases is not None and token is None:
+                    continue
+                yield self._start_item(page, checkpoint, token)
+            
+            if not response.get('has_more') or not response.get('next_cursor'):
+                break
+            query['start_cursor'] = response['next_cursor']
+
+    async def adownload_many(self, files):
+        """
+        Download several files from the event loop.
+
+        Downloads run in worker threads so the streaming and caching logic of
+        _download_file is shared, with at most max_concurrency in flight.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def download(file_info):
+            async with semaphore:
+                return await asyncio.to_thread(
+                    self._download_file, file_info['url'], file_info.get('name') or ''
+                )
+        
+        return await asyncio.gather(*(download(file_info) for file_info in files))
+
+    def _build_query(self, page_size, incremental):
+        """Build the database query and the done pages to skip for a batch run"""
+        query = {
+            'database_id': self.database_id,
+            'page_size': page_size
+        }
+        done = {}
+        
+        if incremental:
+            since, done = SyncCheckpoint(self.checkpoint_path).get(self.database_id)
+            query['sorts'] = [{'timestamp': 'last_edited_time', 'direction': 'ascending'}]
+            if since:
+                query['filter'] = {
+                    'timestamp': 'last_edited_time',
+                    'last_edited_time': {'on_or_after': since}
+                }
+        
+        return query, done
+
+    def _claim(self, leases, page_id):
+        """
+        Lease a page for this worker and return the claim token, or None if
+        the page is taken. The lease is renewed in the background while the
+        item is analysed, until the pusher settles it or release_claim()
+        gives it up.
+        """
+        token = claim_token(self.worker_id)
+        if not leases.claim(page_id, token, self.lease_ttl):
+            return None
+        start_heartbeat(leases, page_id, token, self.lease_ttl)
+        return token
+
+    def _start_item(self, page, checkpoint, lease_token=None):
+        """Classify a page about to be handed out and record it as pending in the checkpoint"""
+        item = self._classify_page(page, lease_token=lease_token)
+        if checkpoint is not None and item['last_edited_time']:
+            checkpoint.begin(self.database_id, item['last_edited_time'], item['page_id'])
+            # Lets the pusher mark the item done once it has been pushed
+            item['checkpoint_path'] = self.checkpoint_path
+            item['source_database_id'] = self.database_id
+        return item
+
+    def commit_checkpoint(self, item):
+        """
+        Mark an item as pushed in the incremental sync checkpoint.
+
+        NotionContentPusher does this itself for items that carry a
+        checkpoint_path. Call this only after the downstream push of the
+        item has succeeded.
+        """
+        if not item.get('last_edited_time'):
+            return
+        SyncCheckpoint(self.checkpoint_path).advance(
+            self.database_id,
+            item['last_edited_time'],
+            item['page_id']
+        )
+
+    def release_claim(self, item):
+        """
+        Give up the lease on an item that could not be processed.
+
+        Its pending entry in the checkpoint expires after RELEASED_TTL, so
+        another worker can retry it but a page that keeps failing does not
+        hold the sync back forever.
+        """
+        if item.get('worker_id'):
+            stop_heartbeat(self.lease_db, item['page_id'], item['worker_id'])
+            LeaseStore(self.lease_db).release(item['page_id'], item['worker_id'])
+        if item.get('checkpoint_path'):
+            SyncCheckpoint(item['checkpoint_path']).release(
+                item.get('source_database_id', self.database_id), item['page_id']
+            )
+
+    def _classify_page(self, page, lease_token=None):
+        """Extract properties from a Notion page and identify its content type"""
+        properties = page.get('properties', {})
+        
+        # Extract properties safely
+        name = self.get_property_safely(properties, 'Name')
+        link = self.get_property_safely(properties, 'Link')
+        file_info = self.get_property_safely(properties, 'File')
+        
+        # Determine content type
+        if file_info:
+            content_type = self._identify_file_type(file_info)
+        elif name.startswith('"') and name.endswith('"'):
+            content_type = {'type': 'text', 'platform': 'text'}
+        elif link:
+            content_type = self._identify_content_type(link, name)
+        else:
+            content_type = {'type': 'unknown', 'platform': 'unknown'}
+        
+        item = {
+            'page_id': page['id'],
+            'last_edited_time': page.get('last_edited_time'),
+            'name': name,
+            'link': link,
+            'file': file_info,
+            'type': content_type['type'],
+            'platform': content_type['platform']
+        }
+        
+        # Lets the pusher verify that this claim still holds the lease
+        if lease_token:
+            item['worker_id'] = lease_token
+        
+        return item
+
+    def _identify_file_type(self, file_info):
+        """Helper method to identify content type of an attached file"""
+        name = file_info.get('name') or ''
+        ext = os.path.splitext(name)[1].lower()
+        if not ext:
+            ext = os.path.splitext(urlparse(file_info.get('url', '')).path)[1].lower()
+        
+        mime_type = mimetypes.guess_type(f"file{ext}")[0] or ''
+        
+        if mime_type.startswith('image/'):
+            return {'type': 'image', 'platform': 'file'}
+        if mime_type.startswith('video/') or mime_type.startswith('audio/'):
+            return {'type': 'video', 'platform': 'file'}
+        if ext in DOCUMENT_EXTENSIONS:
+            return {'type': 'document', 'platform': 'file'}
+        
+        return {'type': 'unknown', 'platform': 'file'}
+
     def _process_file(self, file_obj, name):
         """Process file from Notion and download if necessary"""
         try:
@@ -140,38 +721,138 @@ class NotionDatabaseRetriever(BaseTool):
             print(f"Error processing file: {str(e)}")
             return None
 
+    def download_many(self, files):
+        """
+        Download several files concurrently on a bounded thread pool.
+
+        Takes a list of {'url', 'name'} dicts (as returned for the File
+        property) and returns the local paths in the same order, with None
+        for downloads that failed. The files are kept from cache eviction
+        until they are passed to release_downloads().
+        """
+        if not files:
+            return []
+        
+        workers = max(1, min(self.max_download_workers, len(files)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(
+                lambda file_info: self._download_file(file_info['url'], file_info.get('name') or ''),
+                files
+            ))
+
+    def release_downloads(self, paths):
+        """
+        Release files returned by download_many or adownload_many once they
+        have been processed, so the cache may evict them again
+        """
+        cache = DownloadCache(os.path.join(self.download_dir, '.cache'), self.cache_max_bytes)
+        for path in paths:
+            if path:
+                cache.release(path)
+
     def _download_file(self, url, name):
-        """Download file from URL to local storage"""
+        """
+        Download file from URL to local storage.
+
+        Files go through a content-addressed cache in download_dir/.cache,
+        so a URL that was downloaded before is served without any network
+        traffic. The returned path carries a short content hash, so two
+        attachments with the same name never overwrite each other.
+        """
         try:
             # Create download directory if it doesn't exist
             os.makedirs(self.download_dir, exist_ok=True)
-            
-            # Get file extension from URL or name
-            ext = os.path.splitext(urlparse(url).path)[1]
-            if not ext:
-                ext = os.path.splitext(name)[1]
-            if not ext:
-                # Try to guess extension from content type
-                response = requests.head(url)
-                content_type = response.headers.get('content-type', '')
-                ext = mimetypes.guess_extension(content_type) or ''
+            cache = DownloadCache(os.path.join(self.download_dir, '.cache'), self.cache_max_bytes)
             
             # Create safe filename
             safe_name = "".join([c for c in name if c.isalpha() or c.isdigit() or c in (' ', '-', '_')]).rstrip()
-            filename = f"{safe_name}{ext}"
-            local_path = os.path.join(self.download_dir, filename)
             
-            # Download file
-            response = requests.get(url)
-            with open(local_path, 'wb') as f:
-                f.write(response.content)
+            part_path = os.path.join(
+                self.download_dir,
+                f"{hashlib.sha256(cache.normalize_url(url).encode()).hexdigest()[:16]}.part"
+            )
+            with _part_lock(part_path):
+                object_path = cache.lookup(url)
+                if not object_path:
+                    # Get file extension from URL or name
+                    ext = os.path.splitext(urlparse(url).path)[1]
+                    if not ext:
+                        ext = os.path.splitext(name)[1]
+                    
+                    header_ext, etag = self._fetch_to_part(url, part_path)
+                    object_path = cache.store(url, part_path, ext or header_ext, etag)
+            
+            content_hash, ext = os.path.splitext(os.path.basename(object_path))
+            local_path = os.path.join(self.download_dir, f"{safe_name}-{content_hash[:12]}{ext}")
             
-            return local_path
+            return cache.link(object_path, local_path)
             
         except Exception as e:
             print(f"Error downloading file: {str(e)}")
             return None
 
+    def _fetch_to_part(self, url, part_path):
+        """
+        Stream a URL into part_path and return (extension, etag).
+
+        The body is written in fixed-size chunks. An interrupted download
+        leaves the .part file behind, together with the ETag or Last-Modified
+        of the response in a .validator file. The next attempt resumes with
+        an HTTP Range request conditional on that validator (If-Range), so a
+        file that changed in between is downloaded again from the start.
+        """
+        headers = {}
+        validator_path = part_path + '.validator'
+        resume_from = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if resume_from:
+            try:
+                with open(validator_path, 'r', encoding='utf-8') as f:
+                    validator = f.read().strip()
+            except OSError:
+                validator = ''
+            if validator:
+                headers['Range'] = f"bytes={resume_from}-"
+                headers['If-Range'] = validator
+            else:
+                # Without a validator a resumed file could mix two versions
+                resume_from = 0
+        
+        with requests.get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+            if resume_from and response.status_code == 416:
+                # The partial file already holds the whole body
+                mode = None
+            elif resume_from and response.status_code == 206:
+                mode = 'ab'
+            else:
+                response.raise_for_status()
+                # Fresh download, or the server ignored the Range header
+                mode = 'wb'
+            
+            # Guess extension from the content type of the same response
+            content_type = response.headers.get('content-type', '').split(';')[0].strip()
+            ext = mimetypes.guess_extension(content_type) or ''
+            etag = response.headers.get('etag')
+            
+            if mode == 'wb':
+                # Weak ETags cannot be used in If-Range
+                validator = etag if etag and not etag.startswith('W/') else response.headers.get('last-modified')
+                if validator:
+                    with open(validator_path, 'w', encoding='utf-8') as f:
+                        f.write(validator)
+                elif os.path.exists(validator_path):
+                    os.remove(validator_path)
+            
+            if mode:
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        if chunk:
+                            f.write(chunk)
+        
+        # The .part file is complete, nothing left to resume
+        if os.path.exists(validator_path):
+            os.remove(validator_path)
+        return ext, etag
+
     def _identify_content_type(self, link, name):
         """Helper method to identify content type from link and name"""
         # Check for quoted text first
@@ -183,51 +864,19 @@ class NotionDatabaseRetriever(BaseTool):
             # Only return unknown if we don't have a text entry
             return {'type': 'unknown', 'platform': 'unknown'}
         
-        link_lower = link.lower()
-        
-        # YouTube patterns
-        youtube_patterns = {
-            'watch': r'youtube\.com/watch\?v=[\w-]+',
-            'shorts': r'youtube\.com/shorts/[\w-]+',
-            'youtu.be': r'youtu\.be/[\w-]+'
-        }
-        
-        # Instagram patterns
-        instagram_patterns = {
-            'reel': r'instagram\.com/reels?/[\w-]+',
-            'post': r'instagram\.com/p/[\w-]+',
-            'tv': r'instagram\.com/tv/[\w-]+'
-        }
-        
-        # TikTok patterns
-        tiktok_patterns = {
-            'video': r'tiktok\.com/.+/video/[\w-]+',
-            'vm': r'vm\.tiktok\.com/[\w-]+'
-        }
-        
-        # Check YouTube
-        for pattern in youtube_patterns.values():
-            if re.search(pattern, link_lower):
-                return {'type': 'video', 'platform': 'youtube'}
-        
-        # Check Facebook
-        if 'facebook.com' in link_lower:
-            return {'type': 'manual_processing', 'platform': 'facebook'}
-        
-        # Check Instagram
-        for key, pattern in instagram_patterns.items():
-            if re.search(pattern, link_lower):
-                if key in ['reel', 'tv']:
-                    return {'type': 'video', 'platform': 'instagram'}
-                return {'type': 'website', 'platform': 'instagram'}
-        
-        # Check TikTok
-        for pattern in tiktok_patterns.values():
-            if re.search(pattern, link_lower):
-                return {'type': 'video', 'platform': 'tiktok'}
-        
-        return {'type': 'website', 'platform': 'web'}
+        return classify_link(link)
 
 if __name__ == "__main__":
     tool = NotionDatabaseRetriever()
-    print(tool.run())
\ No newline at end of file
+    print(tool.run())
+    
+    # Batch mode: drain the whole database in one pass
+    for count, item in enumerate(tool.iter_items(), start=1):
+        print(count, item['type'], item['platform'], item['name'])
+    
+    # Incremental sync: only fetch items edited since the last checkpoint
+    incremental_tool = NotionDatabaseRetriever(incremental=True)
+    print(incremental_tool.run())
+    
+    # Asyncio code path
+    print(asyncio.run(tool.arun()))
\ No newline at end of file
@@ -0,0 +1,222 @@
+"""
+Durable write-behind outbox for Notion pushes.
+
+Processed items are written to a local SQLite outbox as soon as analysis
+finishes, so Whisper or GPT output survives a failed or slow push. A
+background flusher drains the outbox in batches, retrying failures with
+exponential backoff. Entries for the same page are pushed strictly in the
+order they were enqueued. Each entry keeps the pusher options it was queued
+with (target database, tag database, state and lease files), so the flusher
+pushes it exactly where the deferred call would have.
+"""
+import os
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+import logging
+
+DEFAULT_OUTBOX_DB = os.getenv(
+    "NOTION_OUTBOX_DB",
+    os.path.join(tempfile.gettempdir(), "notion_outbox.sqlite3")
+)
+
+FLUSH_BATCH_SIZE = 20
+FLUSH_INTERVAL = 2.0
+
+# Failed entries are retried after RETRY_BASE * 2**attempts seconds, capped
+RETRY_BASE = 5.0
+RETRY_MAX = 600.0
+MAX_ATTEMPTS = 8
+
+# Seconds a flusher owns the entries of its batch. Entries of a flusher that
+# died in the middle of a batch go back to pending after that.
+IN_FLIGHT_TTL = 30 * 60
+
+class NotionOutbox:
+    """SQLite-backed queue of content_data waiting to be pushed to Notion"""
+
+    def __init__(self, path=DEFAULT_OUTBOX_DB):
+        self.path = path
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS outbox ("
+                    "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                    "page_id TEXT NOT NULL, "
+                    "payload TEXT NOT NULL, "
+                    "status TEXT NOT NULL DEFAULT 'pending', "
+                    "attempts INTEGER NOT NULL DEFAULT 0, "
+                    "next_attempt_at REAL NOT NULL, "
+                    "last_error TEXT, "
+                    "created_at REAL NOT NULL, "
+                    "options TEXT)"
+                )
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(outbox)")}
+                if 'options' not in columns:
+                    conn.execute("ALTER TABLE outbox ADD COLUMN options TEXT")
+                conn.execute("CREATE INDEX IF NOT EXISTS outbox_page ON outbox (page_id, status, id)")
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def enqueue(self, content_data, options=None):
+        """
+        Durably store an item for pushing and return its outbox ID.
+
+        options are the keyword arguments of the pusher that queued the item,
+        handed back to push_many when the entry is flushed.
+        """
+        page_id = content_data.get('page_id')
+        if not page_id:
+            raise ValueError("content_data has no page_id")
+
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                cursor = conn.execute(
+                    "INSERT INTO outbox (page_id, payload, options, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (page_id, json.dumps(content_data, default=str), json.dumps(options or {}), now, now)
+                )
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def next_batch(self, limit=FLUSH_BATCH_SIZE):
+        """
+        Claim and return up to limit (id, content_data, options) entries that are due.
+
+        The entries are marked in_flight in the same transaction, so flushers
+        sharing the outbox never get the same entry. Only the oldest pending
+        entry of each page is eligible, and none while the page has an entry
+        in flight, so a page never has two pushes in flight and its updates
+        land in order.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # In flight entries use next_attempt_at as their claim expiry
+            conn.execute(
+                "UPDATE outbox SET status = 'pending' WHERE status = 'in_flight' AND next_attempt_at <= ?",
+                (now,)
+            )
+            rows = conn.execute(
+                "SELECT o.id, o.payload, o.options FROM outbox o "
+                "WHERE o.status = 'pending' AND o.next_attempt_at <= ? "
+                "AND o.id = (SELECT MIN(i.id) FROM outbox i "
+                "            WHERE i.page_id = o.page_id AND i.status = 'pending') "
+                "AND NOT EXISTS (SELECT 1 FROM outbox f "
+                "                WHERE f.page_id = o.page_id AND f.status = 'in_flight') "
+                "ORDER BY o.id LIMIT ?",
+                (now, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE outbox SET status = 'in_flight', next_attempt_at = ? WHERE id = ?",
+                [(now + IN_FLIGHT_TTL, entry_id) for entry_id, _, _ in rows]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return [
+            (entry_id, json.loads(payload), json.loads(options or '{}'))
+            for entry_id, payload, options in rows
+        ]
+
+    def mark_done(self, entry_id):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+        finally:
+            conn.close()
+
+    def mark_failed(self, entry_id, error):
+        """
+        Schedule a retry with backoff, or park the entry after MAX_ATTEMPTS.
+
+        Returns the new status, 'pending' or 'dead'.
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                attempts = conn.execute(
+                    "SELECT attempts FROM outbox WHERE id = ?", (entry_id,)
+                ).fetchone()[0] + 1
+                status = 'dead' if attempts >= MAX_ATTEMPTS else 'pending'
+                delay = min(RETRY_MAX, RETRY_BASE * 2 ** attempts)
+                conn.execute(
+                    "UPDATE outbox SET attempts = ?, status = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                    (attempts, status, time.time() + delay, str(error), entry_id)
+                )
+        finally:
+            conn.close()
+        return status
+
+    def stats(self):
+        """Return the number of entries per status"""
+        conn = self._connect()
+        try:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+        finally:
+            conn.close()
+
+    def flush(self, push_many, batch_size=FLUSH_BATCH_SIZE, on_dead=None):
+        """
+        Push one batch of due entries with push_many and record the outcome.
+
+        push_many takes a list of content_data and the matching list of
+        pusher options, and returns one report per item with a 'status' of
+        'success' or 'error'. on_dead(content_data, options) is called for
+        entries that ran out of attempts. Returns the number of entries
+        processed.
+        """
+        batch = self.next_batch(batch_size)
+        if not batch:
+            return 0
+
+        reports = push_many(
+            [content_data for _, content_data, _ in batch],
+            [options for _, _, options in batch]
+        )
+        for (entry_id, content_data, options), report in zip(batch, reports):
+            if report.get('status') == 'success':
+                self.mark_done(entry_id)
+            elif self.mark_failed(entry_id, report.get('error')) == 'dead' and on_dead:
+                on_dead(content_data, options)
+        return len(batch)
+
+class OutboxFlusher(threading.Thread):
+    """Background thread that keeps draining an outbox"""
+
+    def __init__(self, outbox, push_many, batch_size=FLUSH_BATCH_SIZE, interval=FLUSH_INTERVAL, on_dead=None):
+        super().__init__(daemon=True, name="notion-outbox-flusher")
+        self.outbox = outbox
+        self.push_many = push_many
+        self.on_dead = on_dead
+        self.batch_size = batch_size
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                processed = self.outbox.flush(self.push_many, self.batch_size, self.on_dead)
+            except Exception as e:
+                logging.error(f"Error flushing Notion outbox: {str(e)}")
+                processed = 0
+            # Keep draining while there is work, otherwise poll
+            if not processed:
+                self._stop_event.wait(self.interval)
+
+    def stop(self, timeout=None):
+        """Stop after the current batch"""
+        self._stop_event.set()
+        self.join(timeout)
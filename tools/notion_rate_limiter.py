@@ -0,0 +1,150 @@
+"""
+Process-wide throttling and retries for Notion API calls.
+
+Notion allows about 3 requests per second per integration. Every Notion
+call site goes through the shared `notion_limiter`, a token bucket that
+spaces calls out across threads and asyncio tasks alike. Rate limited
+(429) and server error (5xx) responses are retried, honoring Retry-After
+when Notion sends it and falling back to jittered exponential backoff.
+Calls that must not run twice, such as appending blocks, pass
+idempotent=False: a timeout or 5xx may have been applied anyway, so only
+429s, which Notion rejects before doing anything, are retried for them.
+"""
+import os
+import time
+import random
+import asyncio
+import threading
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
+
+# Sustained requests per second and burst size shared by the whole process
+NOTION_REQUESTS_PER_SECOND = float(os.getenv("NOTION_REQUESTS_PER_SECOND", "3"))
+NOTION_BURST = int(os.getenv("NOTION_BURST", "3"))
+
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+
+class NotionRateLimiter:
+    """
+    Token bucket with retry handling for Notion requests.
+
+    Callers reserve a slot under a lock and then sleep outside of it, so
+    threads and asyncio tasks share the same budget without holding the lock
+    while waiting.
+    """
+
+    def __init__(self, rate=NOTION_REQUESTS_PER_SECOND, burst=NOTION_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._metrics = {
+            'calls': 0,
+            'retries': 0,
+            'throttled': 0,
+            'errors': 0,
+            'total_wait': 0.0,
+            'max_wait': 0.0
+        }
+
+    def _reserve(self):
+        """Take a token and return how long the caller must wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+
+            wait = max(0.0, -self._tokens / self.rate, self._paused_until - now)
+
+            self._metrics['calls'] += 1
+            self._metrics['total_wait'] += wait
+            self._metrics['max_wait'] = max(self._metrics['max_wait'], wait)
+            return wait
+
+    def _pause(self, seconds):
+        """Hold back every caller, e.g. after a 429 with Retry-After"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _retry_delay(self, error, attempt, idempotent=True):
+        """Return the delay before retrying, or None if the error is final"""
+        if not idempotent and not (isinstance(error, HTTPResponseError) and error.status == 429):
+            return None
+        if isinstance(error, RequestTimeoutError):
+            status = None
+        elif isinstance(error, HTTPResponseError) and (error.status == 429 or error.status >= 500):
+            status = error.status
+        else:
+            return None
+
+        if attempt >= MAX_RETRIES:
+            return None
+
+        delay = None
+        retry_after = getattr(error, 'headers', {}).get('retry-after') if status else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                delay = None
+        if delay is None:
+            # Full jitter keeps retrying workers from stampeding together
+            delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+        with self._lock:
+            self._metrics['retries'] += 1
+            if status == 429:
+                self._metrics['throttled'] += 1
+        if status == 429:
+            self._pause(delay)
+
+        return delay
+
+    def call(self, fn, *args, idempotent=True, **kwargs):
+        """
+        Call a Notion client method under the rate limit, retrying transient
+        errors. With idempotent=False only rate limited calls are retried.
+        """
+        attempt = 0
+        while True:
+            time.sleep(self._reserve())
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, idempotent)
+                if delay is None:
+                    with self._lock:
+                        self._metrics['errors'] += 1
+                    raise
+                attempt += 1
+                time.sleep(delay)
+
+    async def acall(self, fn, *args, idempotent=True, **kwargs):
+        """Asyncio counterpart of call() for AsyncClient methods"""
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._reserve())
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, idempotent)
+                if delay is None:
+                    with self._lock:
+                        self._metrics['errors'] += 1
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    def metrics(self):
+        """Return a snapshot of call counts and time spent waiting in the queue"""
+        with self._lock:
+            snapshot = dict(self._metrics)
+        snapshot['avg_wait'] = snapshot['total_wait'] / snapshot['calls'] if snapshot['calls'] else 0.0
+        return snapshot
+
+# Shared by every Notion call site in the process
+notion_limiter = NotionRateLimiter()
@@ -0,0 +1,217 @@
+"""
+Bounded streaming fetch of web pages.
+
+The body is streamed and fed to the incremental page parser as it arrives,
+instead of being downloaded and decoded whole. The response is rejected by
+Content-Type before any of it is read, and reading stops at whichever comes
+first: the byte budget, the wall-clock limit, or enough visible text for the
+analysis. Links to binaries or endless streams therefore cost a bounded
+amount of memory and time.
+
+fetch_page uses requests, afetch_page is the asyncio counterpart for a
+shared httpx.AsyncClient. afetch_page keeps only the network I/O on the
+event loop: parsing, compression and cache reads and writes run in worker
+threads. Responses go through the HTTP cache when one is
+given. A body cut short by the budget is cached as partial, and a page
+parsed from a partial entry is reported as incomplete.
+"""
+import re
+import time
+import codecs
+import asyncio
+
+import requests
+
+try:
+    from .html_metadata import PageParser
+except ImportError:
+    from html_metadata import PageParser
+
+FETCH_TIMEOUT = (5, 15)  # connect, read (seconds)
+FETCH_MAX_SECONDS = 30
+FETCH_MAX_BYTES = 5 * 1024 * 1024
+FETCH_MAX_TEXT_CHARS = 100_000
+FETCH_CHUNK_SIZE = 64 * 1024
+
+ALLOWED_CONTENT_TYPES = {'text/html', 'application/xhtml+xml', 'text/plain'}
+
+_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([A-Za-z0-9_.:-]+)', re.IGNORECASE)
+
+class UnsupportedContentError(Exception):
+    """The URL does not serve a page that can be analyzed"""
+
+def _content_type(headers):
+    return (headers.get('Content-Type') or 'text/html').split(';', 1)[0].strip().lower()
+
+def _declared_charset(headers, head):
+    """Charset from the Content-Type header, else from a <meta> tag at the start of the body"""
+    for part in (headers.get('Content-Type') or '').split(';')[1:]:
+        name, _, value = part.partition('=')
+        if name.strip().lower() == 'charset' and value.strip():
+            return value.strip().strip('"\'')
+    match = _CHARSET.search(head[:2048])
+    if match:
+        return match.group(1).decode('ascii')
+    return 'utf-8'
+
+def _decoder(charset):
+    try:
+        return codecs.getincrementaldecoder(charset)(errors='replace')
+    except LookupError:
+        return codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+class FetchResult:
+    """Parsed page and what it took to get it"""
+
+    def __init__(self, url, page, bytes_read, complete, from_cache):
+        self.url = url
+        self.page = page
+        self.bytes_read = bytes_read
+        self.complete = complete
+        self.from_cache = from_cache
+
+class _BoundedReader:
+    """Feeds byte chunks to a page parser until one of the budgets is spent"""
+
+    def __init__(self, headers, backend, max_bytes, max_text_chars, deadline):
+        self.headers = headers
+        self.parser = PageParser(backend)
+        self.max_bytes = max_bytes
+        self.max_text_chars = max_text_chars
+        self.deadline = deadline
+        self.decoder = None
+        self.body = []
+        self.bytes_read = 0
+        self.complete = True
+
+    def feed(self, chunk):
+        """Parse a chunk, return True once a budget is spent and reading should stop"""
+        if not chunk:
+            return False
+        chunk = chunk[:self.max_bytes - self.bytes_read]
+        if self.decoder is None:
+            self.decoder = _decoder(_declared_charset(self.headers, chunk))
+        self.body.append(chunk)
+        self.bytes_read += len(chunk)
+        self.parser.feed(self.decoder.decode(chunk))
+
+        if (self.bytes_read >= self.max_bytes
+                or self.parser.text_length >= self.max_text_chars
+                or time.monotonic() >= self.deadline):
+            self.complete = False
+            return True
+        return False
+
+    def feed_all(self, chunks):
+        for chunk in chunks:
+            if self.feed(chunk):
+                break
+
+    def close(self):
+        if self.decoder is not None:
+            self.parser.feed(self.decoder.decode(b'', final=True))
+        return self.parser.close()
+
+def _iter_cached(content):
+    for start in range(0, len(content), FETCH_CHUNK_SIZE):
+        yield content[start:start + FETCH_CHUNK_SIZE]
+
+def _parse_cached(cache, url, entry, backend, max_bytes, max_text_chars, deadline):
+    cache.touch(url)
+    # Cached header names are stored as the HTTP client gave them, often lowercased
+    headers = requests.structures.CaseInsensitiveDict(entry['headers'])
+    reader = _BoundedReader(headers, backend, max_bytes, max_text_chars, deadline)
+    reader.feed_all(_iter_cached(cache.decompress(entry)))
+    return FetchResult(url, reader.close(), reader.bytes_read, entry['complete'] and reader.complete, True)
+
+def _store(cache, url, status_code, headers, reader):
+    cache.misses += 1
+    if status_code == 200:
+        cache.store(url, headers, b''.join(reader.body), complete=reader.complete)
+
+def fetch_page(url, headers=None, cache=None, backend=None, timeout=FETCH_TIMEOUT,
+               max_seconds=FETCH_MAX_SECONDS, max_bytes=FETCH_MAX_BYTES,
+               max_text_chars=FETCH_MAX_TEXT_CHARS, session=None):
+    """
+    Fetch and parse a page within the given budgets and return a FetchResult.
+
+    Raises UnsupportedContentError for non-page Content-Types and
+    requests.HTTPError for error statuses.
+    """
+    deadline = time.monotonic() + max_seconds
+    entry = cache.lookup(url) if cache is not None else None
+    if entry is not None and entry['expires_at'] > time.time():
+        cache.hits += 1
+        return _parse_cached(cache, url, entry, backend, max_bytes, max_text_chars, deadline)
+
+    request_headers = dict(headers or {})
+    if entry is not None:
+        request_headers.update(cache.conditional_headers(entry))
+
+    response = (session or requests).get(url, headers=request_headers, stream=True, timeout=timeout)
+    try:
+        if entry is not None and response.status_code == 304:
+            cache.revalidated += 1
+            cache.refresh(url, response.headers)
+            return _parse_cached(cache, url, entry, backend, max_bytes, max_text_chars, deadline)
+
+        response.raise_for_status()
+        content_type = _content_type(response.headers)
+        if content_type not in ALLOWED_CONTENT_TYPES:
+            raise UnsupportedContentError(f"Unsupported content type: {content_type}")
+
+        reader = _BoundedReader(response.headers, backend, max_bytes, max_text_chars, deadline)
+        reader.feed_all(response.iter_content(FETCH_CHUNK_SIZE))
+    finally:
+        # Drops the connection if the body was not read to the end
+        response.close()
+
+    page = reader.close()
+    if cache is not None:
+        _store(cache, url, response.status_code, response.headers, reader)
+    return FetchResult(response.url, page, reader.bytes_read, reader.complete, False)
+
+async def afetch_page(client, url, headers=None, cache=None, backend=None,
+                      max_seconds=FETCH_MAX_SECONDS, max_bytes=FETCH_MAX_BYTES,
+                      max_text_chars=FETCH_MAX_TEXT_CHARS):
+    """
+    Asyncio counterpart of fetch_page() on an httpx.AsyncClient.
+
+    Timeouts and connection pooling come from the client. Raises
+    UnsupportedContentError for non-page Content-Types and
+    httpx.HTTPStatusError for error statuses.
+    """
+    deadline = time.monotonic() + max_seconds
+    entry = await asyncio.to_thread(cache.lookup, url) if cache is not None else None
+    if entry is not None and entry['expires_at'] > time.time():
+        cache.hits += 1
+        return await asyncio.to_thread(
+            _parse_cached, cache, url, entry, backend, max_bytes, max_text_chars, deadline
+        )
+
+    request_headers = dict(headers or {})
+    if entry is not None:
+        request_headers.update(cache.conditional_headers(entry))
+
+    async with client.stream('GET', url, headers=request_headers) as response:
+        if entry is not None and response.status_code == 304:
+            cache.revalidated += 1
+            await asyncio.to_thread(cache.refresh, url, response.headers)
+            return await asyncio.to_thread(
+                _parse_cached, cache, url, entry, backend, max_bytes, max_text_chars, deadline
+            )
+
+        response.raise_for_status()
+        content_type = _content_type(response.headers)
+        if content_type not in ALLOWED_CONTENT_TYPES:
+            raise UnsupportedContentError(f"Unsupported content type: {content_type}")
+
+        reader = _BoundedReader(response.headers, backend, max_bytes, max_text_chars, deadline)
+        async for chunk in response.aiter_bytes(FETCH_CHUNK_SIZE):
+            if await asyncio.to_thread(reader.feed, chunk):
+                break
+
+    page = await asyncio.to_thread(reader.close)
+    if cache is not None:
+        await asyncio.to_thread(_store, cache, url, response.status_code, response.headers, reader)
+    return FetchResult(str(response.url), page, reader.bytes_read, reader.complete, False)
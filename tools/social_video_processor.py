@@ -3,12 +3,15 @@ from pydantic import Field
 import yt_dlp
 import os
 import logging
-import whisper
-from moviepy.editor import VideoFileClip
 import tempfile
 from pathlib import Path
 from datetime import datetime
 
+try:
+    from . import whisper_pool
+except ImportError:
+    import whisper_pool
+
 class SocialVideoProcessor(BaseTool):
     """
     Tool to download and process videos from social media platforms
@@ -17,11 +20,14 @@ class SocialVideoProcessor(BaseTool):
         ..., 
         description="The complete data object from the Notion Retriever"
     )
+    whisper_model_size: str = Field(
+        default=whisper_pool.DEFAULT_MODEL_SIZE,
+        description="Whisper model size used for transcription, loaded once per process and shared"
+    )
 
     def __init__(self, **data):
         super().__init__(**data)
         self._temp_dir = tempfile.mkdtemp()
-        self._whisper_model = whisper.load_model("base")
         self._ydl_opts = {
             'format': 'best',  # Get best quality
             'outtmpl': os.path.join(self._temp_dir, '%(title)s.%(ext)s'),
@@ -85,13 +91,14 @@ class SocialVideoProcessor(BaseTool):
                     raise Exception("Video download failed")
 
                 # Extract audio for transcription
+                from moviepy.editor import VideoFileClip
                 video = VideoFileClip(video_path)
                 audio_path = os.path.join(self._temp_dir, "audio.wav")
                 video.audio.write_audiofile(audio_path, logger=None)
                 video.close()
 
-                # Generate transcript
-                result = self._whisper_model.transcribe(audio_path)
+                # Generate transcript with the process-wide model
+                result = whisper_pool.transcribe(audio_path, self.whisper_model_size)
                 transcript = result["text"]
 
                 # Clean up temp files
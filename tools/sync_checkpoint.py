@@ -0,0 +1,176 @@
+"""
+Incremental sync checkpoint of the input Notion databases.
+
+For each database an SQLite file keeps a last_edited_time watermark, below
+which every page has been pushed. The retriever records each page it hands
+out as pending, and the pusher marks it done once the push succeeded. The
+watermark only moves up to the oldest pending page, so a page that failed
+or is still being processed is queried again, however many newer pages
+succeed in the meantime. Done pages at or above the watermark are
+remembered with their last_edited_time, so they are skipped until they are
+edited again.
+
+A pending page only holds the watermark back for a while: PENDING_TTL after
+it was handed out (long enough for outbox retries), or RELEASED_TTL after
+its claim was given up. A page that keeps failing or was deleted therefore
+cannot stall the sync forever. Every change runs in a BEGIN IMMEDIATE
+transaction, so several worker processes can share one checkpoint file.
+"""
+import os
+import json
+import time
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(tempfile.gettempdir(), "notion_retriever_checkpoint.sqlite3")
+
+# Seconds a page handed out for processing holds the watermark back
+PENDING_TTL = 24 * 3600
+
+# Seconds a page whose claim was released still holds it back, so another
+# worker gets to retry it
+RELEASED_TTL = 3600
+
+class SyncCheckpoint:
+    """Watermark, pending and done pages of each database, in SQLite"""
+
+    def __init__(self, path=DEFAULT_CHECKPOINT_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS watermarks ("
+                "database_id TEXT PRIMARY KEY, last_edited_time TEXT)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "database_id TEXT NOT NULL, page_id TEXT NOT NULL, "
+                "last_edited_time TEXT NOT NULL, pending INTEGER NOT NULL, expires_at REAL, "
+                "PRIMARY KEY (database_id, page_id))"
+            )
+            self._import_json(conn)
+
+    @contextmanager
+    def _connect(self):
+        # Autocommit mode, each method manages its own transaction
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self, database_id):
+        """Change the pages of a database and settle its watermark, atomically"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                self._settle(conn, database_id)
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _import_json(self, conn):
+        """Take over the JSON checkpoint written by earlier versions next to this file"""
+        json_path = os.path.splitext(self.path)[0] + '.json'
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        for database_id, entry in data.items():
+            watermark = entry.get('last_edited_time')
+            done = entry.get('done', {page_id: watermark for page_id in entry.get('page_ids', [])})
+            conn.execute(
+                "INSERT OR IGNORE INTO watermarks (database_id, last_edited_time) VALUES (?, ?)",
+                (database_id, watermark)
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO pages (database_id, page_id, last_edited_time, pending) VALUES (?, ?, ?, 0)",
+                [(database_id, page_id, edited) for page_id, edited in done.items() if edited]
+            )
+        conn.execute("COMMIT")
+        try:
+            os.remove(json_path)
+        except FileNotFoundError:
+            # Another process imported it at the same time
+            pass
+
+    def get(self, database_id):
+        """Return (watermark, {page_id: last_edited_time} of done pages to skip) for a database"""
+        with self._connect() as conn:
+            # Settle first, pending pages may have expired since the last change
+            conn.execute("BEGIN IMMEDIATE")
+            self._settle(conn, database_id)
+            row = conn.execute(
+                "SELECT last_edited_time FROM watermarks WHERE database_id = ?", (database_id,)
+            ).fetchone()
+            done = dict(conn.execute(
+                "SELECT page_id, last_edited_time FROM pages WHERE database_id = ? AND pending = 0",
+                (database_id,)
+            ).fetchall())
+            conn.execute("COMMIT")
+        return (row[0] if row else None), done
+
+    def begin(self, database_id, last_edited_time, page_id, ttl=PENDING_TTL):
+        """Record a page handed out for processing, holding the watermark below it"""
+        with self._transaction(database_id) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (database_id, page_id, last_edited_time, pending, expires_at) "
+                "VALUES (?, ?, ?, 1, ?)",
+                (database_id, page_id, last_edited_time, time.time() + ttl)
+            )
+
+    def advance(self, database_id, last_edited_time, page_id):
+        """Mark a page as successfully pushed and move the watermark as far as it can go"""
+        with self._transaction(database_id) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (database_id, page_id, last_edited_time, pending, expires_at) "
+                "VALUES (?, ?, ?, 0, NULL)",
+                (database_id, page_id, last_edited_time)
+            )
+
+    def release(self, database_id, page_id, ttl=RELEASED_TTL):
+        """Let a pending page whose claim was given up stop holding the watermark after ttl"""
+        with self._transaction(database_id) as conn:
+            conn.execute(
+                "UPDATE pages SET expires_at = MIN(expires_at, ?) "
+                "WHERE database_id = ? AND page_id = ? AND pending = 1",
+                (time.time() + ttl, database_id, page_id)
+            )
+
+    @staticmethod
+    def _settle(conn, database_id):
+        """Put the watermark at the oldest pending page, or the newest done one"""
+        conn.execute(
+            "DELETE FROM pages WHERE database_id = ? AND pending = 1 AND expires_at <= ?",
+            (database_id, time.time())
+        )
+        # ISO 8601 timestamps from Notion compare correctly as strings
+        oldest_pending, newest_done = conn.execute(
+            "SELECT MIN(CASE WHEN pending = 1 THEN last_edited_time END), "
+            "MAX(CASE WHEN pending = 0 THEN last_edited_time END) "
+            "FROM pages WHERE database_id = ?",
+            (database_id,)
+        ).fetchone()
+        row = conn.execute(
+            "SELECT last_edited_time FROM watermarks WHERE database_id = ?", (database_id,)
+        ).fetchone()
+        watermark = oldest_pending or newest_done or (row[0] if row else None)
+        if watermark is None:
+            return
+
+        conn.execute(
+            "INSERT OR REPLACE INTO watermarks (database_id, last_edited_time) VALUES (?, ?)",
+            (database_id, watermark)
+        )
+        # Done pages below the watermark are never queried again
+        conn.execute(
+            "DELETE FROM pages WHERE database_id = ? AND pending = 0 AND last_edited_time < ?",
+            (database_id, watermark)
+        )
@@ -1,16 +1,28 @@
 from agency_swarm.tools import BaseTool
 from pydantic import Field
-import nltk
-from nltk.tokenize import sent_tokenize
 from dotenv import load_dotenv
 
+try:
+    from .lazy_resources import lazy_resource
+except ImportError:
+    from lazy_resources import lazy_resource
+
 load_dotenv()
 
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+def _load_sent_tokenize():
+    """Import NLTK and make sure the punkt data is available"""
+    import nltk
+    from nltk.tokenize import sent_tokenize
+    
+    # Download required NLTK data
+    try:
+        nltk.data.find('tokenizers/punkt')
+    except LookupError:
+        nltk.download('punkt')
+    
+    return sent_tokenize
+
+sent_tokenize = lazy_resource("nltk_sent_tokenize", _load_sent_tokenize)
 
 class TextAnalyzer(BaseTool):
     """
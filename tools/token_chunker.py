@@ -0,0 +1,91 @@
+"""
+Token-aware splitting of long text for LLM prompts.
+
+Text is measured and split in model tokens (tiktoken when installed,
+otherwise pieces of about four characters, which is close to the average
+for English text) so each chunk fits the prompt budget it was sized for.
+Consecutive chunks overlap, so a sentence cut at one boundary is whole in
+one of the two chunks. merge_overlapping() removes the duplicated words
+again when the per-chunk results are joined.
+"""
+import re
+
+_APPROXIMATE_TOKEN = re.compile(r'\s*\S{1,4}|\s+$')
+
+# Longest run of words compared when removing overlap between results
+MAX_OVERLAP_WORDS = 400
+
+class _ApproximateEncoding:
+    """Stand-in for a tiktoken encoding, one token per four characters of a word"""
+
+    def encode(self, text):
+        return _APPROXIMATE_TOKEN.findall(text)
+
+    def decode(self, tokens):
+        return ''.join(tokens)
+
+_encodings = {}
+
+def get_encoding(model):
+    """tiktoken encoding for a model, or the approximate one without tiktoken"""
+    if model not in _encodings:
+        try:
+            import tiktoken
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = tiktoken.get_encoding("o200k_base")
+        except ImportError:
+            _encodings[model] = _ApproximateEncoding()
+    return _encodings[model]
+
+def count_tokens(text, model):
+    return len(get_encoding(model).encode(text))
+
+def split_tokens(text, model, chunk_tokens, overlap_tokens=0, max_tokens=None):
+    """
+    Split text into chunks of at most chunk_tokens tokens, each starting
+    overlap_tokens before the end of the previous one. Only the first
+    max_tokens tokens of the text are used when given.
+    """
+    if overlap_tokens >= chunk_tokens:
+        raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+
+    encoding = get_encoding(model)
+    tokens = encoding.encode(text)
+    if max_tokens is not None:
+        tokens = tokens[:max_tokens]
+
+    chunks = []
+    step = chunk_tokens - overlap_tokens
+    for start in range(0, len(tokens), step):
+        chunks.append(encoding.decode(tokens[start:start + chunk_tokens]))
+        if start + chunk_tokens >= len(tokens):
+            break
+    return chunks
+
+def merge_overlapping(parts, separator='\n\n'):
+    """Join per-chunk results, dropping words a result repeats from the end of the previous one"""
+    merged = []
+    previous_words = []
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+
+        words = part.split()
+        limit = min(len(previous_words), len(words), MAX_OVERLAP_WORDS)
+        overlap = 0
+        for size in range(limit, 0, -1):
+            if previous_words[-size:] == words[:size]:
+                overlap = size
+                break
+
+        if overlap:
+            if overlap == len(words):
+                continue
+            # Cut the repeated words off the start of this part
+            part = part.split(None, overlap)[-1]
+        merged.append(part)
+        previous_words = words
+    return separator.join(merged)
@@ -0,0 +1,140 @@
+"""
+YouTube transcripts fetched concurrently and kept on disk.
+
+Segment lists are stored zlib-compressed in SQLite, keyed by video ID and
+language preference, so a video's transcript is downloaded once however
+often it is processed. Videos without a transcript are remembered for a
+while too, instead of being asked for again on every run. fetch_many()
+downloads the missing transcripts of many videos on a bounded thread pool.
+"""
+import os
+import json
+import time
+import zlib
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
+
+DEFAULT_TRANSCRIPT_DB = os.getenv(
+    "YOUTUBE_TRANSCRIPT_DB",
+    os.path.join(tempfile.gettempdir(), "youtube_transcripts.sqlite3")
+)
+DEFAULT_LANGUAGES = ('en',)
+DEFAULT_MAX_WORKERS = 8
+
+# How long to trust that a video has no transcript before asking again
+UNAVAILABLE_TTL = 24 * 60 * 60
+
+def join_segments(segments):
+    """Transcript text from a segment list, in one pass over the segments"""
+    return ' '.join(segment['text'] for segment in segments)
+
+def download_segments(video_id, languages=DEFAULT_LANGUAGES):
+    """Segment dicts (text, start, duration) of a video's transcript"""
+    # youtube-transcript-api 1.x replaced the get_transcript classmethod
+    if hasattr(YouTubeTranscriptApi, 'get_transcript'):
+        return YouTubeTranscriptApi.get_transcript(video_id, languages=list(languages))
+    return YouTubeTranscriptApi().fetch(video_id, languages=list(languages)).to_raw_data()
+
+class TranscriptStore:
+    """Compressed transcript segments per (video ID, languages), with concurrent fetching"""
+
+    def __init__(self, path=DEFAULT_TRANSCRIPT_DB):
+        self.path = path
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS transcripts ("
+                    "video_id TEXT NOT NULL, "
+                    "language TEXT NOT NULL, "
+                    "segments BLOB, "
+                    "fetched_at REAL NOT NULL, "
+                    "PRIMARY KEY (video_id, language))"
+                )
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @staticmethod
+    def _language_key(languages):
+        return ','.join(languages)
+
+    def lookup(self, video_id, languages=DEFAULT_LANGUAGES):
+        """
+        Return (found, segments). segments is None when the video is known
+        to have no transcript, found is False when nothing is stored.
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT segments, fetched_at FROM transcripts WHERE video_id = ? AND language = ?",
+                (video_id, self._language_key(languages))
+            ).fetchone()
+        finally:
+            conn.close()
+
+        if row is None:
+            return False, None
+        segments, fetched_at = row
+        if segments is None:
+            if time.time() - fetched_at > UNAVAILABLE_TTL:
+                return False, None
+            return True, None
+        return True, json.loads(zlib.decompress(segments))
+
+    def store(self, video_id, languages, segments):
+        """Store a segment list, or None to record that there is no transcript"""
+        blob = zlib.compress(json.dumps(segments).encode('utf-8'), 6) if segments is not None else None
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO transcripts (video_id, language, segments, fetched_at) VALUES (?, ?, ?, ?)",
+                    (video_id, self._language_key(languages), blob, time.time())
+                )
+        finally:
+            conn.close()
+
+    def get_segments(self, video_id, languages=DEFAULT_LANGUAGES):
+        """Stored segments of a video, downloaded and stored on a miss. None without a transcript."""
+        found, segments = self.lookup(video_id, languages)
+        if found:
+            return segments
+
+        try:
+            segments = download_segments(video_id, languages)
+        except (TranscriptsDisabled, NoTranscriptFound):
+            segments = None
+        # Other errors (network, rate limits) are not remembered
+        self.store(video_id, languages, segments)
+        return segments
+
+    def get_text(self, video_id, languages=DEFAULT_LANGUAGES):
+        segments = self.get_segments(video_id, languages)
+        return join_segments(segments) if segments is not None else None
+
+    def fetch_many(self, video_ids, languages=DEFAULT_LANGUAGES, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Transcript text of many videos, downloading the missing ones
+        concurrently. Returns {video_id: text, or None without a transcript
+        or on error}.
+        """
+        unique_ids = list(dict.fromkeys(video_ids))
+        if not unique_ids:
+            return {}
+
+        def fetch(video_id):
+            try:
+                return self.get_text(video_id, languages)
+            except Exception:
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique_ids)))) as executor:
+            return dict(zip(unique_ids, executor.map(fetch, unique_ids)))
@@ -2,36 +2,27 @@ from agency_swarm.tools import BaseTool
 from pydantic import Field
 import os
 from pytube import YouTube
-from youtube_transcript_api import YouTubeTranscriptApi
-import re
 from dotenv import load_dotenv
-import urllib.request
 import json
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from .lazy_resources import lazy_resource
+    from .youtube_metadata import VideoMetadataCache
+    from .transcript_store import TranscriptStore, DEFAULT_MAX_WORKERS
+except ImportError:
+    from lazy_resources import lazy_resource
+    from youtube_metadata import VideoMetadataCache
+    from transcript_store import TranscriptStore, DEFAULT_MAX_WORKERS
 
 load_dotenv()
 
+metadata_cache = lazy_resource("youtube_metadata_cache", VideoMetadataCache)
+transcripts = lazy_resource("youtube_transcripts", TranscriptStore)
+
 def get_video_info(video_id):
-    """Get video info directly from YouTube"""
-    url = f"https://www.youtube.com/watch?v={video_id}"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    request = urllib.request.Request(url, headers=headers)
-    response = urllib.request.urlopen(request)
-    html = response.read().decode('utf-8')
-    
-    # Extract title
-    title_match = re.search(r'"title":"([^"]+)"', html)
-    title = title_match.group(1) if title_match else "Unknown Title"
-    
-    # Extract channel name
-    channel_match = re.search(r'"channelName":"([^"]+)"', html)
-    channel = channel_match.group(1) if channel_match else "Unknown Channel"
-    
-    return {
-        'title': title,
-        'channel': channel,
-    }
+    """Get title, channel, views and publish date of a video, cached per video ID"""
+    return dict(metadata_cache.get_or_fetch(video_id))
 
 class VideoProcessor(BaseTool):
     """
@@ -77,6 +68,24 @@ class VideoProcessor(BaseTool):
         except Exception as e:
             return f"Error processing video: {str(e)}"
 
+    @classmethod
+    def process_many(cls, items, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Process many videos, such as a playlist backfill, on a bounded pool.
+
+        Missing transcripts are downloaded concurrently first, then each item
+        runs as with run() and finds its transcript in the store. Results are
+        returned in the same order as items.
+        """
+        if not items:
+            return []
+        
+        video_ids = [cls._extract_youtube_id(item.get('link') or '') for item in items]
+        transcripts.fetch_many([video_id for video_id in video_ids if video_id], max_workers=max_workers)
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+            return list(executor.map(lambda item: cls(retriever_data=item).run(), items))
+
     def _process_youtube_video(self, url):
         """Process YouTube video specifically"""
         try:
@@ -85,22 +94,19 @@ class VideoProcessor(BaseTool):
             if not video_id:
                 return "Could not extract video ID"
             
-            # Get video info directly
+            # Get video info, views and publish date included
             info = get_video_info(video_id)
             
             # Add additional info
             info.update({
                 'platform': 'YouTube',
-                'url': url,
-                'views': 0,  # Default value as we can't reliably get this
-                'publish_date': 'Unknown Date'
+                'url': url
             })
             
-            # Get transcript if available
+            # Get transcript if available, stored after the first download
             try:
-                print(video_id)
-                transcript = YouTubeTranscriptApi.get_transcript(video_id)
-                info['transcript'] = ' '.join([entry['text'] for entry in transcript])
+                transcript = transcripts.get_text(video_id)
+                info['transcript'] = transcript if transcript is not None else "No transcript available"
             except:
                 info['transcript'] = "No transcript available"
             
@@ -109,7 +115,8 @@ class VideoProcessor(BaseTool):
         except Exception as e:
             return f"Error processing YouTube video: {str(e)}"
 
-    def _extract_youtube_id(self, url):
+    @staticmethod
+    def _extract_youtube_id(url):
         """Extract YouTube video ID from URL"""
         try:
             from urllib.parse import urlparse, parse_qs
@@ -1,19 +1,81 @@
 from agency_swarm.tools import BaseTool
 from pydantic import Field
-import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
 import re
+import asyncio
+from contextlib import asynccontextmanager, AsyncExitStack
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from .lazy_resources import lazy_resource
+    from .http_cache import HttpCache
+    from .page_fetcher import fetch_page, afetch_page, FETCH_TIMEOUT, FETCH_MAX_BYTES, FETCH_MAX_TEXT_CHARS
+    from .token_chunker import split_tokens, merge_overlapping
+    from .llm_cache import chat_completion
+except ImportError:
+    from lazy_resources import lazy_resource
+    from http_cache import HttpCache
+    from page_fetcher import fetch_page, afetch_page, FETCH_TIMEOUT, FETCH_MAX_BYTES, FETCH_MAX_TEXT_CHARS
+    from token_chunker import split_tokens, merge_overlapping
+    from llm_cache import chat_completion
 
 load_dotenv()
 
-client = OpenAI(
-    api_key=os.environ.get("OPENAI_API_KEY"),
-)
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# analyze_many: pages fetched at once overall, and from any single host
+DEFAULT_MAX_CONCURRENCY = 32
+DEFAULT_PER_HOST_LIMIT = 4
+
+# analyze_many: pages whose content is extracted at once, each sending up to
+# max_llm_workers GPT requests. Fetch slots are released before extraction.
+DEFAULT_MAX_LLM_PAGES = 4
+
+# GPT extraction: page text is split into overlapping chunks that are
+# extracted concurrently. A chunk is sized so its extraction fits in the
+# completion limit, and chunks past the input budget are not sent.
+EXTRACTION_MODEL = "gpt-4o"
+CHUNK_TOKENS = 1200
+CHUNK_OVERLAP_TOKENS = 100
+CHUNK_COMPLETION_TOKENS = 1500
+DEFAULT_MAX_INPUT_TOKENS = 24000
+DEFAULT_MAX_LLM_WORKERS = 8
+
+# Item kind of this tool's requests in an LLMBatchJob
+BATCH_KIND = "website"
+
+EXTRACTION_PROMPT = """You are a content extractor. Your task is to identify and extract the main content from a webpage.
+                        For articles: Extract the full article text
+                        For social media: Extract the post content
+                        For product pages: Extract the product description
+                        
+                        Return ONLY the raw content, without any analysis or modification."""
+
+# Local extraction below this confidence falls back to GPT
+DEFAULT_MIN_LOCAL_CONFIDENCE = 0.5
+
+def _create_openai_client():
+    # Imported here so loading the tool does not pay for the OpenAI SDK
+    from openai import OpenAI
+    return OpenAI(
+        api_key=os.environ.get("OPENAI_API_KEY"),
+    )
+
+client = lazy_resource("openai", _create_openai_client)
+http_cache = lazy_resource("website_http_cache", HttpCache)
+
+@asynccontextmanager
+async def _holding(semaphores):
+    """Hold every given asyncio semaphore for the duration of the block"""
+    async with AsyncExitStack() as stack:
+        for semaphore in semaphores:
+            await stack.enter_async_context(semaphore)
+        yield
 
 class WebsiteAnalyzer(BaseTool):
     """
@@ -23,6 +85,34 @@ class WebsiteAnalyzer(BaseTool):
         ..., 
         description="The complete data object from the Notion Retriever"
     )
+    min_local_confidence: float = Field(
+        default=DEFAULT_MIN_LOCAL_CONFIDENCE,
+        description="Confidence needed to keep the locally extracted main content instead of asking GPT (0 never calls GPT, above 1 always does)"
+    )
+    use_http_cache: bool = Field(
+        default=True,
+        description="Reuse cached pages and revalidate them with conditional requests instead of downloading them again"
+    )
+    max_download_bytes: int = Field(
+        default=FETCH_MAX_BYTES,
+        description="Stop reading the page after this many bytes"
+    )
+    max_text_chars: int = Field(
+        default=FETCH_MAX_TEXT_CHARS,
+        description="Stop reading the page once this much visible text has been collected"
+    )
+    max_input_tokens: int = Field(
+        default=DEFAULT_MAX_INPUT_TOKENS,
+        description="Most page text tokens sent to GPT across all chunks"
+    )
+    max_llm_workers: int = Field(
+        default=DEFAULT_MAX_LLM_WORKERS,
+        description="Chunks extracted by GPT at the same time"
+    )
+    use_llm_cache: bool = Field(
+        default=True,
+        description="Answer repeated GPT requests from the shared local response cache"
+    )
 
     def run(self):
         """
@@ -34,125 +124,273 @@ class WebsiteAnalyzer(BaseTool):
             if not website_url:
                 raise Exception("No website URL provided")
 
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(website_url, headers=headers)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Get website name
-            website_name = urlparse(website_url).netloc
-            
-            # Find publication date
-            publish_date = self._find_publish_date(soup)
-            
-            # Use GPT to identify the main content
-            content = self._identify_main_content(soup.get_text(separator=' ', strip=True))
-            
-            # Create a copy of the original data
-            processed_data = self.retriever_data.copy()
+            page = self._fetch_page(website_url)
+            return self._analyze_page(website_url, page)
+
+        except Exception as e:
+            return f"Error analyzing website: {str(e)}"
+
+    async def arun(self, http_client, fetch_slots=(), extract_slots=()):
+        """
+        Asyncio counterpart of run() that fetches with a shared httpx.AsyncClient.
+
+        The fetch_slots semaphores are held only while the page is fetched and
+        parsed, and the extract_slots ones while its content is extracted.
+        """
+        try:
+            website_url = self.retriever_data.get('link')
+            if not website_url:
+                raise Exception("No website URL provided")
             
-            # Add processed content
-            processed_data['processed_content'] = {
-                'title': self._find_title(soup),
-                'author': self._find_author(soup),
-                'website_name': website_name,
-                'content': content,
-                'published_date': publish_date,
-                'processing_agent': 'Website Agent'
-            }
+            async with _holding(fetch_slots):
+                page = (await afetch_page(
+                    http_client,
+                    website_url,
+                    cache=http_cache if self.use_http_cache else None,
+                    max_bytes=self.max_download_bytes,
+                    max_text_chars=self.max_text_chars
+                )).page
             
-            return processed_data
+            # Content extraction may call GPT, keep it off the event loop
+            async with _holding(extract_slots):
+                return await asyncio.to_thread(self._analyze_page, website_url, page)
 
         except Exception as e:
             return f"Error analyzing website: {str(e)}"
 
-    def _find_publish_date(self, soup):
-        """Try to find publication date in various formats"""
-        # Common meta tags for dates
-        date_meta_tags = [
-            'article:published_time',
-            'datePublished',
-            'date',
-            'pubdate',
-            'publishdate',
-            'og:published_time'
-        ]
+    @classmethod
+    def analyze_many(cls, items, max_concurrency=DEFAULT_MAX_CONCURRENCY, per_host_limit=DEFAULT_PER_HOST_LIMIT,
+                     max_llm_pages=DEFAULT_MAX_LLM_PAGES, **options):
+        """Blocking wrapper around aanalyze_many() for callers without an event loop"""
+        return asyncio.run(cls.aanalyze_many(items, max_concurrency, per_host_limit, max_llm_pages, **options))
+
+    @classmethod
+    async def aanalyze_many(cls, items, max_concurrency=DEFAULT_MAX_CONCURRENCY, per_host_limit=DEFAULT_PER_HOST_LIMIT,
+                            max_llm_pages=DEFAULT_MAX_LLM_PAGES, **options):
+        """
+        Analyze many retriever_data items concurrently.
+
+        All fetches share one pooled keep-alive httpx.AsyncClient. At most
+        max_concurrency pages are fetched at once, and at most per_host_limit
+        from the same host, so one slow or rate-limiting site cannot take
+        every slot. A page gives its fetch slots back once it is parsed, and
+        at most max_llm_pages pages are in content extraction at once, so
+        slow GPT calls never hold up fetching. Extra options are passed to
+        each WebsiteAnalyzer. Results are returned in the same order as
+        items, as run() would return them.
+        """
+        # Imported here so the single-page tool does not need httpx
+        import httpx
         
-        for tag in date_meta_tags:
-            date = soup.find('meta', property=tag) or soup.find('meta', attrs={'name': tag})
-            if date and date.get('content'):
-                return date['content']
+        if not items:
+            return []
         
-        # Look for time tags
-        time_tag = soup.find('time')
-        if time_tag and time_tag.get('datetime'):
-            return time_tag['datetime']
+        semaphore = asyncio.Semaphore(max_concurrency)
+        host_semaphores = {}
+        llm_semaphore = asyncio.Semaphore(max_llm_pages)
         
-        return 'Not available'
-
-    def _find_title(self, soup):
-        """Find the main title of the page"""
-        # Try article title first
-        article_title = soup.find('h1')
-        if article_title:
-            return article_title.get_text(strip=True)
+        async def analyze(http_client, item):
+            host = urlparse(item.get('link') or '').netloc.lower()
+            host_semaphore = host_semaphores.setdefault(host, asyncio.Semaphore(per_host_limit))
+            return await cls(retriever_data=item, **options).arun(
+                http_client,
+                fetch_slots=(host_semaphore, semaphore),
+                extract_slots=(llm_semaphore,)
+            )
         
-        # Fallback to page title
-        if soup.title:
-            return soup.title.string.strip()
+        connect_timeout, read_timeout = FETCH_TIMEOUT
+        async with httpx.AsyncClient(
+            headers=REQUEST_HEADERS,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            follow_redirects=True
+        ) as http_client:
+            return await asyncio.gather(*(analyze(http_client, item) for item in items))
+
+    @classmethod
+    def prepare_batch(cls, items, job, max_workers=DEFAULT_MAX_LLM_WORKERS, **options):
+        """
+        Fetch many pages and add the GPT extraction requests of the pages
+        that need them to an LLMBatchJob, for join_batch() to finish later.
+        Pages with confident local extraction add no requests.
+        """
+        def prepare(item):
+            tool = cls(retriever_data=item, **options)
+            try:
+                website_url = item.get('link')
+                if not website_url:
+                    raise Exception("No website URL provided")
+                
+                page = tool._fetch_page(website_url)
+                if tool._has_local_content(page):
+                    return item, tool._analyze_page(website_url, page, page['main_content']), []
+                return item, tool._analyze_page(website_url, page, ''), tool._extraction_requests(page['text'])
+            
+            except Exception as e:
+                return item, None, f"Error analyzing website: {str(e)}"
         
-        return 'Not available'
-
-    def _find_author(self, soup):
-        """Try to find author information"""
-        # Common author meta tags and classes
-        author_elements = [
-            soup.find('meta', property='author'),
-            soup.find('meta', attrs={'name': 'author'}),
-            soup.find(class_='author'),
-            soup.find(attrs={'rel': 'author'}),
-            soup.find('a', class_='author')
-        ]
+        if not items:
+            return
         
-        for element in author_elements:
-            if element:
-                if element.get('content'):
-                    return element['content']
-                return element.get_text(strip=True)
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+            prepared = list(executor.map(prepare, items))
         
-        return 'Not available'
+        for item, processed_data, chat_requests in prepared:
+            if processed_data is None:
+                job.add(BATCH_KIND, item, error=chat_requests)
+            else:
+                job.add(BATCH_KIND, item, context={'processed_data': processed_data}, requests=chat_requests)
+
+    @classmethod
+    def join_batch(cls, job, backend=None):
+        """
+        Results of the items prepare_batch() added to a finished job, in
+        order and as run() would return them
+        """
+        results = []
+        for _, context, texts, error in job.items(BATCH_KIND, backend):
+            processed_data = context.get('processed_data')
+            if processed_data is None:
+                results.append(error)
+                continue
+            
+            if texts:
+                processed_data['processed_content']['content'] = (
+                    f"Error extracting content: {error}" if error else cls._merge_extractions(texts)
+                )
+            results.append(processed_data)
+        return results
+
+    def _fetch_page(self, website_url):
+        """
+        Stream the page into the parser, collecting title, author, date and
+        text in a single pass within the size, time and text budgets
+        """
+        return fetch_page(
+            website_url,
+            headers=REQUEST_HEADERS,
+            cache=http_cache if self.use_http_cache else None,
+            max_bytes=self.max_download_bytes,
+            max_text_chars=self.max_text_chars
+        ).page
+
+    def _analyze_page(self, website_url, page, content=None):
+        """Build the processed data for a parsed page, extracting the content unless given"""
+        # Get website name
+        website_name = urlparse(website_url).netloc
+        
+        # Find publication date
+        publish_date = self._find_publish_date(page)
+        
+        # Identify the main content, with GPT only for unclear pages
+        if content is None:
+            content = self._extract_main_content(page)
+        
+        # Create a copy of the original data
+        processed_data = self.retriever_data.copy()
+        
+        # Add processed content
+        processed_data['processed_content'] = {
+            'title': self._find_title(page),
+            'author': self._find_author(page),
+            'website_name': website_name,
+            'content': content,
+            'published_date': publish_date,
+            'processing_agent': 'Website Agent'
+        }
+        
+        return processed_data
+
+    def _find_publish_date(self, page):
+        """Publication date from the date meta tags or the first <time> tag"""
+        return page['published_date'] or 'Not available'
+
+    def _find_title(self, page):
+        """Find the main title of the page, the first <h1> or else <title>"""
+        return page['title'] or 'Not available'
+
+    def _find_author(self, page):
+        """Author from the author meta tags or an element marked as author"""
+        if page['author'] is None:
+            return 'Not available'
+        return page['author']
+
+    def _extract_main_content(self, page):
+        """
+        Main content found by text and link density scoring of the page, or
+        by GPT when the local extraction is short, link-heavy or ambiguous
+        """
+        if self._has_local_content(page):
+            return page['main_content']
+        return self._identify_main_content(page['text'])
+
+    def _has_local_content(self, page):
+        return bool(page['main_content']) and page['main_content_confidence'] >= self.min_local_confidence
 
     def _identify_main_content(self, text):
-        """Use GPT to identify the main content of the page"""
+        """
+        Use GPT to identify the main content of the page.
+
+        Long pages are split into overlapping token chunks within
+        max_input_tokens, the chunks are extracted concurrently and the
+        results are joined with the overlap removed.
+        """
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are a content extractor. Your task is to identify and extract the main content from a webpage.
-                        For articles: Extract the full article text
-                        For social media: Extract the post content
-                        For product pages: Extract the product description
-                        
-                        Return ONLY the raw content, without any analysis or modification."""
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Extract the main content from this webpage:\n{text[:4000]}"
-                    }
-                ],
-                temperature=0.3,
-                max_tokens=1500
-            )
+            chat_requests = self._extraction_requests(text)
             
-            return response.choices[0].message.content.strip()
+            def extract(request):
+                return chat_completion(client, use_cache=self.use_llm_cache, **request)
+            
+            if len(chat_requests) == 1:
+                return self._merge_extractions([extract(chat_requests[0])])
+            
+            workers = max(1, min(self.max_llm_workers, len(chat_requests)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return self._merge_extractions(list(executor.map(extract, chat_requests)))
 
         except Exception as e:
             return f"Error extracting content: {str(e)}"
 
+    def _extraction_requests(self, text):
+        """Chat requests extracting the main content, one per chunk of the page text"""
+        chunks = split_tokens(
+            text,
+            EXTRACTION_MODEL,
+            CHUNK_TOKENS,
+            CHUNK_OVERLAP_TOKENS,
+            max_tokens=self.max_input_tokens
+        )
+        if len(chunks) <= 1:
+            # The single chunk is the text cut to max_input_tokens
+            page_text = chunks[0] if chunks else ''
+            prompts = [f"Extract the main content from this webpage:\n{page_text}"]
+        else:
+            prompts = [
+                f"This is part {index + 1} of {len(chunks)} of a webpage's text, parts overlap slightly. "
+                f"Extract the main content in this part only, and return nothing if it has none:\n{chunk}"
+                for index, chunk in enumerate(chunks)
+            ]
+        
+        return [
+            {
+                "model": EXTRACTION_MODEL,
+                "messages": [
+                    {"role": "system", "content": EXTRACTION_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                "temperature": 0.3,
+                "max_tokens": CHUNK_COMPLETION_TOKENS
+            }
+            for prompt in prompts
+        ]
+
+    @staticmethod
+    def _merge_extractions(texts):
+        """Join the per-chunk extractions with the overlap removed"""
+        if len(texts) == 1:
+            return texts[0].strip()
+        return merge_overlapping(texts)
+
 if __name__ == "__main__":
     # Test with sample retriever data
     test_data = {
@@ -0,0 +1,60 @@
+"""
+Process-wide pool of Whisper models, one per model size.
+
+Each size is loaded once, on first use or by prewarm(), and shared by every
+tool instance and thread. A model is not safe to run from two threads at
+once (transcribe() installs key/value cache hooks on the shared modules), so
+calls on the same model take turns. Different sizes run in parallel.
+
+    from whisper_pool import transcribe, prewarm
+    prewarm("base")                      # at worker startup, optional
+    text = transcribe(audio_path)["text"]
+"""
+import os
+import threading
+
+try:
+    from . import lazy_resources
+except ImportError:
+    import lazy_resources
+
+DEFAULT_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "base")
+
+_transcribe_locks = {}
+_locks_guard = threading.Lock()
+
+def _resource_name(size):
+    return f"whisper:{size}"
+
+def _register(size):
+    def load():
+        # Imported here so loading the tools does not pull in torch
+        import whisper
+        return whisper.load_model(size)
+
+    lazy_resources.register(_resource_name(size), load)
+    with _locks_guard:
+        return _transcribe_locks.setdefault(size, threading.Lock())
+
+def get_model(size=DEFAULT_MODEL_SIZE):
+    """The shared model of a size, loaded on first use"""
+    _register(size)
+    return lazy_resources.get(_resource_name(size))
+
+def transcribe(audio, size=DEFAULT_MODEL_SIZE, **options):
+    """Transcribe with the shared model of a size, one call per model at a time"""
+    lock = _register(size)
+    model = lazy_resources.get(_resource_name(size))
+    with lock:
+        return model.transcribe(audio, **options)
+
+def prewarm(*sizes):
+    """Load the given sizes now, the default size if none are given"""
+    for size in sizes or (DEFAULT_MODEL_SIZE,):
+        get_model(size)
+
+def is_loaded(size=DEFAULT_MODEL_SIZE):
+    return lazy_resources.is_loaded(_resource_name(size))
+
+# Registered up front so lazy_resources.prewarm() includes the default model
+_register(DEFAULT_MODEL_SIZE)
@@ -0,0 +1,260 @@
+"""
+Lease-based claiming of input items so several workers can share one database.
+
+A worker claims a page before processing it and holds the claim for a
+limited time (the lease). Long-running work keeps the lease alive with
+heartbeats. If a worker dies, its lease expires and another worker picks the
+item up. Claims are made atomically in a SQLite database, which every worker
+on the host points at through NOTION_LEASE_DB.
+
+An item queued in the push outbox is handed off: its lease is blocked for
+everyone, including the worker that queued it, until the outbox pushes it
+or gives up on it.
+"""
+import os
+import time
+import socket
+import uuid
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+
+DEFAULT_LEASE_DB = os.getenv(
+    "NOTION_LEASE_DB",
+    os.path.join(tempfile.gettempdir(), "notion_work_leases.sqlite3")
+)
+
+# Seconds a claim stays valid without a heartbeat
+DEFAULT_LEASE_TTL = 900
+
+# Seconds a finished item stays blocked so a stale query cannot hand it out again
+COMPLETED_TTL = 3600
+
+# Seconds a handed-off item stays blocked while the outbox retries its push
+HANDOFF_TTL = 24 * 3600
+
+# Values of the completed column
+IN_PROGRESS, COMPLETED, HANDED_OFF = 0, 1, 2
+
+# Heartbeats give up after this many seconds, so an item whose lease is
+# never settled still goes back to the other workers eventually
+HEARTBEAT_MAX_SECONDS = 6 * 3600
+
+def default_worker_id():
+    """Identify this worker process uniquely across hosts"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def claim_token(worker_id):
+    """
+    Holder ID for a single claim by a worker.
+
+    Every call in a process shares the worker ID, so leases are held under
+    a token unique to the claim. Only the same token counts as already
+    holding a lease, and two calls never get the same item.
+    """
+    return f"{worker_id}/{uuid.uuid4().hex}"
+
+class LeaseStore:
+    """Atomic claim, heartbeat and release of item leases in SQLite"""
+
+    def __init__(self, path=DEFAULT_LEASE_DB):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                "item_id TEXT PRIMARY KEY, worker_id TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, completed INTEGER NOT NULL DEFAULT 0)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        # Autocommit mode, claim() manages its own transaction
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def claim(self, item_id, worker_id, ttl=DEFAULT_LEASE_TTL):
+        """
+        Try to take the lease on an item.
+
+        Succeeds if the item is unclaimed, its lease has expired, or this
+        holder already has it. Pass a claim_token() rather than a bare worker
+        ID, so separate claims in one process do not count as the same holder. Completed and handed-off items cannot be
+        claimed until their marker expires.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT worker_id, expires_at, completed FROM leases WHERE item_id = ?",
+                (item_id,)
+            ).fetchone()
+            if row and row[1] > now and (row[2] or row[0] != worker_id):
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO leases (item_id, worker_id, expires_at, completed) "
+                "VALUES (?, ?, ?, ?)",
+                (item_id, worker_id, now + ttl, IN_PROGRESS)
+            )
+            conn.execute("COMMIT")
+            return True
+
+    def hand_off(self, item_id, worker_id, ttl=HANDOFF_TTL):
+        """
+        Turn this worker's lease into a hand-off to the push outbox.
+
+        The item is blocked for every worker, this one included, until
+        complete() or release(handed_off=True) is called or ttl runs out.
+        Returns False if another worker holds the item or it is already done.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT worker_id, expires_at, completed FROM leases WHERE item_id = ?",
+                (item_id,)
+            ).fetchone()
+            if row and row[1] > now and (row[2] == COMPLETED or row[0] != worker_id):
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO leases (item_id, worker_id, expires_at, completed) "
+                "VALUES (?, ?, ?, ?)",
+                (item_id, worker_id, now + ttl, HANDED_OFF)
+            )
+            conn.execute("COMMIT")
+            return True
+
+    def held_state(self, item_id, worker_id):
+        """
+        IN_PROGRESS, COMPLETED or HANDED_OFF for a valid lease this worker
+        holds on an item, or None if it holds none.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT completed FROM leases WHERE item_id = ? AND worker_id = ? AND expires_at > ?",
+                (item_id, worker_id, time.time())
+            ).fetchone()
+            return row[0] if row else None
+
+    def heartbeat(self, item_id, worker_id, ttl=DEFAULT_LEASE_TTL):
+        """Extend a lease held by this worker. Returns False if it was lost."""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE leases SET expires_at = ? "
+                "WHERE item_id = ? AND worker_id = ? AND expires_at > ? AND completed = ?",
+                (now + ttl, item_id, worker_id, now, IN_PROGRESS)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, item_id, worker_id, ttl=COMPLETED_TTL):
+        """Mark an item as done so no worker claims it while queries catch up"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE leases SET completed = ?, expires_at = ? "
+                "WHERE item_id = ? AND worker_id = ?",
+                (COMPLETED, time.time() + ttl, item_id, worker_id)
+            )
+
+    def release(self, item_id, worker_id, handed_off=False):
+        """
+        Give up a lease early, e.g. after a failure, so another worker can retry.
+
+        A handed-off lease is only released with handed_off=True, so a failed
+        outbox push that will be retried keeps the item blocked.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM leases WHERE item_id = ? AND worker_id = ? AND completed = ?",
+                (item_id, worker_id, HANDED_OFF if handed_off else IN_PROGRESS)
+            )
+
+    def purge_expired(self):
+        """Remove expired leases and completion markers"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM leases WHERE expires_at <= ?", (time.time(),))
+
+class LeaseHeartbeat:
+    """
+    Keep a lease alive from a background thread while work is in progress.
+
+    Usage:
+        with LeaseHeartbeat(store, item_id, worker_id) as lease:
+            ...  # long-running processing
+            if lease.lost:
+                ...  # another worker took over
+
+    When the work spans several tools, start_heartbeat() and
+    stop_heartbeat() do the same without a with block.
+    """
+
+    def __init__(self, store, item_id, worker_id, ttl=DEFAULT_LEASE_TTL, max_seconds=HEARTBEAT_MAX_SECONDS):
+        self.store = store
+        self.item_id = item_id
+        self.worker_id = worker_id
+        self.ttl = ttl
+        self.max_seconds = max_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, daemon=True, name=f"lease-heartbeat-{item_id}")
+
+    def _beat(self):
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.ttl / 3) and time.monotonic() < deadline:
+            if not self.store.heartbeat(self.item_id, self.worker_id, self.ttl):
+                # Lost, or settled by complete() or hand_off()
+                self.lost = True
+                return
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+_heartbeats = {}
+_heartbeats_lock = threading.Lock()
+
+def _heartbeat_key(path, item_id, worker_id):
+    return os.path.abspath(path), item_id, worker_id
+
+def start_heartbeat(store, item_id, worker_id, ttl=DEFAULT_LEASE_TTL):
+    """
+    Keep a claimed lease alive in the background until stop_heartbeat() is
+    called for it, e.g. from the retriever's claim to the pusher's settle.
+    """
+    key = _heartbeat_key(store.path, item_id, worker_id)
+    with _heartbeats_lock:
+        # Forget heartbeats that ended on their own
+        for ended in [k for k, heartbeat in _heartbeats.items() if not heartbeat.is_alive()]:
+            del _heartbeats[ended]
+        if key in _heartbeats:
+            return _heartbeats[key]
+        heartbeat = _heartbeats[key] = LeaseHeartbeat(store, item_id, worker_id, ttl).start()
+    return heartbeat
+
+def stop_heartbeat(path, item_id, worker_id):
+    """Stop the heartbeat started for a lease, if this process has one"""
+    with _heartbeats_lock:
+        heartbeat = _heartbeats.pop(_heartbeat_key(path, item_id, worker_id), None)
+    if heartbeat is not None:
+        heartbeat.stop()
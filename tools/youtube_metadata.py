@@ -0,0 +1,217 @@
+"""
+YouTube video metadata from the watch page's ytInitialPlayerResponse.
+
+The watch page is read in chunks only until the ytInitialPlayerResponse
+JSON object is complete, which is near the top of a page of a megabyte or
+more. The object is parsed once for the title, channel, view count and
+publish date. If the page does not have it (consent walls, layout changes),
+the oEmbed endpoint still gives the title and channel. Results are cached
+per video ID with a TTL, since view counts keep changing. When neither
+source answers, placeholder metadata is returned and cached only briefly.
+"""
+import os
+import json
+import time
+import codecs
+import sqlite3
+import tempfile
+import urllib.request
+from urllib.parse import quote
+
+DEFAULT_METADATA_DB = os.getenv(
+    "YOUTUBE_METADATA_DB",
+    os.path.join(tempfile.gettempdir(), "youtube_metadata.sqlite3")
+)
+DEFAULT_METADATA_TTL = int(os.getenv("YOUTUBE_METADATA_TTL", 6 * 60 * 60))
+# Placeholders are cached this long, so a video is not fetched again on every
+# call while YouTube is unreachable, yet gets its real metadata soon after
+UNKNOWN_METADATA_TTL = 5 * 60
+
+UNKNOWN_METADATA = {
+    'title': 'Unknown Title',
+    'channel': 'Unknown Channel',
+    'views': 0,
+    'publish_date': 'Unknown Date'
+}
+
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9'
+}
+READ_CHUNK_SIZE = 64 * 1024
+# Give up on the watch page after this many bytes without a complete blob
+MAX_PAGE_BYTES = 4 * 1024 * 1024
+REQUEST_TIMEOUT = 15
+
+PLAYER_RESPONSE_MARKER = 'ytInitialPlayerResponse = '
+OEMBED_URL = "https://www.youtube.com/oembed?format=json&url="
+
+class _JsonObjectScanner:
+    """Finds the end of a JSON object in text that arrives in pieces"""
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.started = False
+
+    def feed(self, text, offset=0):
+        """Return the index just past the closing brace in text, or None if not there yet"""
+        for index in range(offset, len(text)):
+            char = text[index]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == '{':
+                self.depth += 1
+                self.started = True
+            elif char == '}':
+                self.depth -= 1
+                if self.started and self.depth == 0:
+                    return index + 1
+        return None
+
+def read_player_response(response, max_bytes=MAX_PAGE_BYTES):
+    """
+    Read a watch page response until ytInitialPlayerResponse is complete
+    and return it parsed, or None if the page does not contain it
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    scanner = _JsonObjectScanner()
+    text = ''
+    blob_start = None
+    scanned = 0
+    bytes_read = 0
+
+    while bytes_read < max_bytes:
+        chunk = response.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        bytes_read += len(chunk)
+        text += decoder.decode(chunk)
+
+        if blob_start is None:
+            marker = text.find(PLAYER_RESPONSE_MARKER)
+            if marker == -1:
+                # Keep just enough to find a marker split across chunks
+                text = text[-len(PLAYER_RESPONSE_MARKER):]
+                continue
+            blob_start = marker + len(PLAYER_RESPONSE_MARKER)
+            scanned = blob_start
+
+        end = scanner.feed(text, scanned)
+        if end is not None:
+            return json.loads(text[blob_start:end])
+        scanned = len(text)
+    return None
+
+def metadata_from_player_response(player_response):
+    """Title, channel, views and publish date from a parsed ytInitialPlayerResponse"""
+    details = player_response.get('videoDetails') or {}
+    microformat = (player_response.get('microformat') or {}).get('playerMicroformatRenderer') or {}
+    if not details.get('title'):
+        return None
+
+    try:
+        views = int(details.get('viewCount') or microformat.get('viewCount') or 0)
+    except ValueError:
+        views = 0
+    return {
+        'title': details['title'],
+        'channel': details.get('author') or microformat.get('ownerChannelName') or 'Unknown Channel',
+        'views': views,
+        'publish_date': microformat.get('publishDate') or microformat.get('uploadDate') or 'Unknown Date',
+        'length_seconds': int(details.get('lengthSeconds') or 0)
+    }
+
+def fetch_oembed(video_id):
+    """Title and channel from the oEmbed endpoint, which has no views or date"""
+    watch_url = f"https://www.youtube.com/watch?v={video_id}"
+    request = urllib.request.Request(OEMBED_URL + quote(watch_url, safe=''), headers=REQUEST_HEADERS)
+    with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+        data = json.loads(response.read().decode('utf-8'))
+    return {
+        'title': data.get('title') or 'Unknown Title',
+        'channel': data.get('author_name') or 'Unknown Channel',
+        'views': 0,
+        'publish_date': 'Unknown Date'
+    }
+
+def fetch_metadata(video_id):
+    """
+    Metadata from the watch page, or from oEmbed when the page has none.
+
+    Returns a copy of UNKNOWN_METADATA when both fail.
+    """
+    request = urllib.request.Request(f"https://www.youtube.com/watch?v={video_id}", headers=REQUEST_HEADERS)
+    try:
+        with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+            player_response = read_player_response(response)
+        metadata = metadata_from_player_response(player_response or {})
+        if metadata:
+            return metadata
+    except (OSError, ValueError):
+        pass
+    try:
+        return fetch_oembed(video_id)
+    except (OSError, ValueError):
+        return dict(UNKNOWN_METADATA)
+
+class VideoMetadataCache:
+    """SQLite cache of video metadata per video ID, with a TTL"""
+
+    def __init__(self, path=DEFAULT_METADATA_DB, ttl=DEFAULT_METADATA_TTL):
+        self.path = path
+        self.ttl = ttl
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS video_metadata ("
+                    "video_id TEXT PRIMARY KEY, "
+                    "metadata TEXT NOT NULL, "
+                    "expires_at REAL NOT NULL)"
+                )
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get(self, video_id):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT metadata FROM video_metadata WHERE video_id = ? AND expires_at > ?",
+                (video_id, time.time())
+            ).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0]) if row else None
+
+    def put(self, video_id, metadata, ttl=None):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO video_metadata (video_id, metadata, expires_at) VALUES (?, ?, ?)",
+                    (video_id, json.dumps(metadata), time.time() + (self.ttl if ttl is None else ttl))
+                )
+        finally:
+            conn.close()
+
+    def get_or_fetch(self, video_id):
+        """Cached metadata for a video, fetched and stored when missing or expired"""
+        metadata = self.get(video_id)
+        if metadata is None:
+            metadata = fetch_metadata(video_id)
+            self.put(video_id, metadata, UNKNOWN_METADATA_TTL if metadata == UNKNOWN_METADATA else None)
+        return metadata